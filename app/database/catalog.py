@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+from config import Config
+from .model import Service, Staff
+
+logger = logging.getLogger(__name__)
+
+
+class Catalog(NamedTuple):
+    """One consistent snapshot of the catalog tables"""
+    version: int
+    services: dict         # id -> Service
+    staff: dict            # id -> Staff
+    service_staff: dict    # service id -> staff ids assigned to it
+
+
+class CatalogCache:
+    """
+    In-memory copy of the services, staff and staff_services tables.
+
+    The catalog is small and changes rarely, while the POS cart looks the
+    same rows up on every redraw. Everything is loaded in one pass into
+    dicts keyed by id. Triggers bump catalog_version on every write to the
+    three tables (see app.database.maintenance); at most every TTL seconds,
+    and straight after invalidate(), a database worker compares it with the
+    snapshot's and reloads when it moved. Lookups never wait for that: they
+    keep reading the old snapshot until the new one is swapped in. Only the
+    very first lookup loads the catalog in the calling thread.
+    """
+
+    def __init__(self, db_manager, ttl=None):
+        """
+        Args:
+            db_manager: DatabaseManager used to load the catalog
+            ttl (float): Seconds between checks for catalog changes
+        """
+        self.db = db_manager
+        self.ttl = Config.CATALOG_CACHE_TTL if ttl is None else ttl
+
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._checked_at = None
+        self._stale = False
+        self._refreshing = False
+
+    def invalidate(self):
+        """Check for catalog changes now, in the background"""
+        with self._lock:
+            self._stale = True
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        try:
+            self.db.submit(self._refresh)
+        except RuntimeError:
+            # The worker threads have been shut down
+            with self._lock:
+                self._refreshing = False
+
+    def _snapshot(self):
+        """The current Catalog, loading it on first use and scheduling a check when due"""
+        catalog = self._catalog
+        if catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._load()
+                    self._checked_at = time.monotonic()
+                return self._catalog
+
+        if self._stale or time.monotonic() - self._checked_at >= self.ttl:
+            self._schedule_refresh()
+        return catalog
+
+    def _refresh(self):
+        """Reload the catalog on a worker thread if catalog_version moved"""
+        try:
+            with self._lock:
+                # An invalidate() from here on asks for another check
+                self._stale = False
+            current = self._catalog
+            with self.db.read_connection() as conn:
+                version = self._version(conn)
+            if current is None or version != current.version:
+                catalog = self._load()
+                with self._lock:
+                    self._catalog = catalog
+        except Exception as e:
+            logger.error(f"Error refreshing catalog: {e}")
+        finally:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                self._refreshing = False
+
+    @staticmethod
+    def _version(conn):
+        row = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+        return row[0] if row else 0
+
+    def _load(self):
+        with self.db.read_connection() as conn:
+            # Read the version first: a write landing mid-load bumps it again,
+            # so the next check reloads
+            version = self._version(conn)
+            services = {row['id']: Service.from_row(row) for row in conn.execute('SELECT * FROM services')}
+            staff = {row['id']: Staff.from_row(row) for row in conn.execute('SELECT * FROM staff')}
+
+            service_staff = {}
+            for row in conn.execute('SELECT service_id, staff_id FROM staff_services WHERE can_perform'):
+                service_staff.setdefault(row['service_id'], []).append(row['staff_id'])
+
+        logger.debug("Loaded catalog version %d: %d services, %d staff", version, len(services), len(staff))
+        return Catalog(version, services, staff, service_staff)
+
+    def get_service(self, service_id):
+        """Get a service by id, or None"""
+        return self._snapshot().services.get(service_id)
+
+    def get_services(self, category=None, active_only=True):
+        """Get services sorted by name, optionally limited to one category"""
+        services = [
+            service for service in self._snapshot().services.values()
+            if (not active_only or service.active)
+            and (category is None or service.category == category)
+        ]
+        return sorted(services, key=lambda service: service.name)
+
+    def get_staff(self, staff_id):
+        """Get a staff member by id, or None"""
+        return self._snapshot().staff.get(staff_id)
+
+    def get_active_staff(self):
+        """Get all active staff sorted by name"""
+        return self._active_staff(self._snapshot())
+
+    @staticmethod
+    def _active_staff(catalog):
+        return sorted(
+            (staff for staff in catalog.staff.values() if staff.active),
+            key=lambda staff: staff.name
+        )
+
+    def get_doctors_for_service(self, service_id):
+        """
+        Get the active doctors who can perform a service
+        A service without any staff_services assignments can be performed
+        by every active doctor.
+        """
+        catalog = self._snapshot()
+        doctors = [staff for staff in self._active_staff(catalog) if staff.role == 'doctor']
+        assigned = catalog.service_staff.get(service_id)
+        if assigned is None:
+            return doctors
+        return [doctor for doctor in doctors if doctor.id in assigned]
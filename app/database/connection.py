@@ -0,0 +1,169 @@
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def open_connection(db_path=None, read_only=False):
+    """
+    Open a SQLite connection with the application's PRAGMAs applied
+    Args:
+        db_path: Database file, defaults to Config.DATABASE_PATH
+        read_only (bool): Reject writes on this connection (PRAGMA query_only)
+    """
+    db_path = db_path or Config.DATABASE_PATH
+    # Connections move between threads through the pool, but only one
+    # caller ever uses a connection at a time
+    conn = sqlite3.connect(db_path, timeout=Config.DATABASE_TIMEOUT, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+
+    conn.execute(f'PRAGMA busy_timeout = {int(Config.DATABASE_TIMEOUT * 1000)}')
+    conn.execute(f'PRAGMA cache_size = -{int(Config.DATABASE_CACHE_SIZE_KB)}')
+    conn.execute(f'PRAGMA mmap_size = {int(Config.DATABASE_MMAP_SIZE)}')
+    conn.execute('PRAGMA foreign_keys = ON')
+    if read_only:
+        conn.execute('PRAGMA query_only = ON')
+    else:
+        # WAL lets readers run alongside the writer; NORMAL is durable
+        # against application crashes and only risks the last commits on
+        # power loss, which is the usual trade-off for WAL
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
+
+
+
+def execute_script(conn, sql):
+    """
+    Run a script of SQL statements one at a time with conn.execute
+    Unlike executescript(), which commits first, this leaves any open
+    transaction (and the commit) to the caller.
+    """
+    statement = ''
+    for line in sql.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+    if statement.strip():
+        raise ValueError(f"Incomplete SQL statement: {statement.strip()}")
+
+
+class ConnectionPool:
+    """
+    Pool of pre-configured, read-only SQLite connections.
+
+    Connections are created lazily, handed out one caller at a time and
+    reused afterwards, so a query no longer pays for a connect/close. With
+    the database in WAL mode readers see the last committed state and never
+    wait for, or hold up, the writer.
+    """
+
+    def __init__(self, db_path=None, size=None):
+        """
+        Args:
+            db_path: Database file, defaults to Config.DATABASE_PATH
+            size (int): Maximum number of idle connections kept open
+        """
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.size = size or Config.DATABASE_POOL_SIZE
+
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self):
+        """Take an idle connection from the pool, or open a new one"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            logger.debug("Opening reader connection to %s", self.db_path)
+            return open_connection(self.db_path, read_only=True)
+
+    def release(self, conn):
+        """Return a connection to the pool, closing it if the pool is full"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._idle.put_nowait(conn)
+                    return
+                except queue.Full:
+                    pass
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection; borrowed ones are closed on release"""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+class WriterConnection:
+    """
+    The single connection all writes go through.
+
+    SQLite allows one writer at a time anyway; funnelling writes through one
+    connection behind a lock turns lock contention (and SQLITE_BUSY retries)
+    into a simple queue. Nested transactions on the same thread join the
+    outer one and are committed when it finishes.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            logger.debug("Opening writer connection to %s", self.db_path)
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    @contextmanager
+    def transaction(self):
+        """Hold the writer for a with-block; commits on success, rolls back on error"""
+        with self._lock:
+            conn = self._connection()
+            if self._depth == 0 and not conn.in_transaction:
+                # Explicit, so schema changes are part of the transaction too
+                conn.execute('BEGIN')
+            self._depth += 1
+            try:
+                yield conn
+            except Exception:
+                self._depth -= 1
+                if self._depth == 0:
+                    conn.rollback()
+                raise
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    conn.commit()
+
+    def close(self):
+        """Close the writer connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
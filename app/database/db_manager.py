@@ -1,249 +1,320 @@
-import sqlite3
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, NamedTuple, Optional, Dict, Any
+from datetime import datetime, timedelta
 import uuid
+import base64
+import json
 import logging
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 
 from config import Config
-from .model import Patient, Service, Transaction, TransactionItem, Appointment, Staff
-import logging
+from .catalog import CatalogCache
+from .connection import ConnectionPool, WriterConnection
+from .model import PatientRow, Service, Transaction, TransactionItem, Appointment, Staff
+from .maintenance import patient_search_index_exists, rebuild_last_visits
+from .migrations import migrate
+from app.utils.phone import (
+    is_phone_query,
+    normalize_phone,
+    phone_query_prefixes,
+    reversed_phone,
+)
 
 logger = logging.getLogger(__name__)
 
+# Default cap on search results; the front desk only ever looks at the top hits
+SEARCH_RESULT_LIMIT = 50
+
+# Rows per page when the patient list is paged through
+PATIENT_PAGE_SIZE = 100
+
+# Rows per page when staff or services are paged through
+CATALOG_PAGE_SIZE = 50
+
+# Rows per query when streaming a whole table (exports, reports)
+STREAM_PAGE_SIZE = 500
+
+# Columns selected by every patient query, in PatientRow field order; the
+# patients table is always aliased as p
+PATIENT_COLUMNS = '''
+    p.id, p.name, p.phone, p.email, p.address, p.birth_date,
+    p.gender, p.emergency_contact, p.medical_history, p.notes,
+    p.created_at, p.updated_at, p.last_visit_at
+'''
+
+# Orders accepted by the iter_* methods and the (indexed) keys behind them;
+# the last key is unique so the order is total
+PATIENT_ORDERS = {'name': ('name', 'id')}
+STAFF_ORDERS = {'name': ('name', 'id')}
+SERVICE_ORDERS = {'name': ('name', 'id'), 'category': ('category', 'name', 'id')}
+
+# Tables whose rows must outlive a patient: sales and clinical records
+PATIENT_RECORD_TABLES = ('transactions', 'appointments', 'treatment_records', 'patient_documents')
+
+
+class Page(NamedTuple):
+    """One page of a keyset-paginated query"""
+    rows: list
+    next_cursor: Optional[str]   # after= for the following page; None on the last page
+    prev_cursor: Optional[str]   # before= for the preceding page; None on the first page
+
+
+def encode_cursor(values):
+    """Turn the key values of a row into an opaque cursor token"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(token):
+    """Turn a cursor token back into key values"""
+    return tuple(json.loads(base64.urlsafe_b64decode(token.encode())))
+
+
+def _parse_timestamp(value):
+    """Parse a TIMESTAMP column value into a datetime"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _patient_row(cursor, row):
+    """sqlite3 row factory for queries selecting PATIENT_COLUMNS"""
+    return PatientRow._make(row[:-1] + (_parse_timestamp(row[-1]),))
+
 
 class DatabaseManager:
     def __init__(self):
         """Initialize database connection and setup tables"""
         logger.debug("Initializing DatabaseManager")
         try:
-            self.conn = sqlite3.connect('clinic.db')
-            self.conn.row_factory = sqlite3.Row
+            self.db_path = Config.DATABASE_PATH
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+            # Writes are serialized on one connection; reads borrow a
+            # read-only connection from the pool and, with WAL, never block
+            # (or wait for) the writer. Both are safe to use from worker threads.
+            self.writer = WriterConnection(self.db_path)
+            self.pool = ConnectionPool(self.db_path)
+
+            # Services/staff lookups for the POS are served from memory
+            self.catalog = CatalogCache(self)
+
+            # Worker threads for queries submitted from the GUI
+            self.executor = ThreadPoolExecutor(
+                max_workers=Config.DATABASE_WORKERS,
+                thread_name_prefix='db'
+            )
 
-            # Create tables
-            self.create_tables()
+            # Bring the schema up to date
+            self.migrate_schema()
 
-            # Add test data if database is empty
-            self.initialize_test_data()
+            # Development fixtures, only when explicitly enabled
+            if Config.SEED_TEST_DATA:
+                self.initialize_test_data()
 
             logger.debug("Database initialization complete")
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
             raise
 
-    def create_tables(self):
-        """Create necessary database tables"""
-        cursor = self.conn.cursor()
-
+    def migrate_schema(self):
+        """Apply pending schema migrations; a no-op read on an up-to-date database"""
         try:
-            # First drop existing tables if they exist to ensure clean state
-            tables = ['doctor_notes', 'patient_photos', 'patients']
-            for table in tables:
-                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            with self.get_connection() as conn:
+                applied = migrate(conn)
+                if applied:
+                    logger.info("Applied %d schema migrations", applied)
 
-            # Patients table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS patients (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    email TEXT,
-                    address TEXT,
-                    birth_date TEXT,
-                    gender TEXT,
-                    emergency_contact TEXT,
-                    medical_history TEXT,
-                    notes TEXT,
-                    created_at TIMESTAMP,
-                    updated_at TIMESTAMP
-                )
-            ''')
-
-            # Doctor notes table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS doctor_notes (
-                    id TEXT PRIMARY KEY,
-                    patient_id TEXT NOT NULL,
-                    medical_history TEXT,
-                    progress_notes TEXT,
-                    recommendations TEXT,
-                    next_steps TEXT,
-                    created_at TIMESTAMP,
-                    FOREIGN KEY (patient_id) REFERENCES patients(id)
-                )
-            ''')
-
-            # Photos table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS patient_photos (
-                    id TEXT PRIMARY KEY,
-                    patient_id TEXT NOT NULL,
-                    photo_path TEXT NOT NULL,
-                    photo_type TEXT,
-                    created_at TIMESTAMP,
-                    FOREIGN KEY (patient_id) REFERENCES patients(id)
-                )
-            ''')
-
-            self.conn.commit()
-            logger.debug("Tables created successfully")
+                # FTS5 trigram support depends on how SQLite was built
+                self.patient_search_enabled = patient_search_index_exists(conn)
 
         except Exception as e:
-            logger.error(f"Error creating tables: {e}")
-            self.conn.rollback()
+            logger.error(f"Error migrating database schema: {e}")
             raise
 
     def get_patient(self, patient_id):
-        """Get patient by ID"""
-        logger.debug(f"Getting patient by ID: {patient_id}")
+        """Get patient by ID as a PatientRow, or None"""
+        logger.debug("Getting patient %s", patient_id)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT id, name, phone, email, address, birth_date,
-                       gender, emergency_contact, medical_history, notes,
-                       created_at, updated_at
-                FROM patients 
-                WHERE id = ?
-            ''', (patient_id,))
-            row = cursor.fetchone()
-            if row:
-                patient_dict = dict(row)
-                logger.debug(f"Found patient: {patient_dict['name']}")
-                return patient_dict
-            logger.debug("Patient not found")
-            return None
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = _patient_row
+                cursor.execute(f'''
+                    SELECT {PATIENT_COLUMNS}
+                    FROM patients p
+                    WHERE p.id = ?
+                ''', (patient_id,))
+                patient = cursor.fetchone()
+                if patient is None:
+                    logger.debug("Patient not found")
+                return patient
 
         except Exception as e:
             logger.error(f"Error getting patient: {e}")
             return None
 
+    def get_patient_records(self, patient_id):
+        """
+        Count the sales and clinical records that keep a patient from being deleted
+        Returns:
+            dict: Table name to number of rows, only for tables with rows
+        """
+        with self.read_connection() as conn:
+            counts = {
+                table: conn.execute(
+                    f'SELECT COUNT(*) FROM {table} WHERE patient_id = ?', (patient_id,)
+                ).fetchone()[0]
+                for table in PATIENT_RECORD_TABLES
+            }
+        return {table: count for table, count in counts.items() if count}
+
     def delete_patient(self, patient_id):
-        """Delete a patient from the database"""
-        logger.debug(f"Deleting patient with ID: {patient_id}")
+        """
+        Delete a patient with their notes and photos
+        Patients with transactions, appointments, treatment records or
+        documents are kept (foreign keys protect those records); check
+        get_patient_records() first to tell the user why.
+        Returns:
+            bool: True if the patient was deleted
+        """
+        logger.debug("Deleting patient %s", patient_id)
         try:
-            cursor = self.conn.cursor()
+            records = self.get_patient_records(patient_id)
+            if records:
+                logger.warning("Not deleting patient %s, who has records: %s", patient_id, records)
+                return False
 
-            # First delete associated records
-            cursor.execute("DELETE FROM doctor_notes WHERE patient_id = ?", (patient_id,))
-            cursor.execute("DELETE FROM patient_photos WHERE patient_id = ?", (patient_id,))
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
 
-            # Then delete patient
-            cursor.execute("DELETE FROM patients WHERE id = ?", (patient_id,))
+                # Clear the cached last visit first so the delete triggers on
+                # notes/photos have nothing to recompute
+                cursor.execute("UPDATE patients SET last_visit_at = NULL WHERE id = ?", (patient_id,))
 
-            self.conn.commit()
-            logger.debug("Patient deleted successfully")
-            return True
+                # First delete associated records
+                cursor.execute("DELETE FROM doctor_notes WHERE patient_id = ?", (patient_id,))
+                cursor.execute("DELETE FROM patient_photos WHERE patient_id = ?", (patient_id,))
+
+                # Then delete patient
+                cursor.execute("DELETE FROM patients WHERE id = ?", (patient_id,))
+
+                logger.debug("Patient deleted successfully")
+                return True
 
         except Exception as e:
             logger.error(f"Error deleting patient: {e}")
-            self.conn.rollback()
             return False
 
     def initialize_test_data(self):
         """Initialize database with test data if empty"""
         try:
-            cursor = self.conn.cursor()
-            logger.debug("Checking database content...")
-
-            # Delete all existing test data first
-            cursor.execute("DELETE FROM doctor_notes")
-            cursor.execute("DELETE FROM patients")
-            self.conn.commit()
-
-            logger.debug("Adding test data...")
-            # Add test patients
-            test_patients = [
-                {
-                    "name": "Test Patient",
-                    "phone": "123-456-7890",
-                    "email": "test@example.com",
-                    "medical_history": "Initial visit with general checkup"
-                },
-                {
-                    "name": "John Doe",
-                    "phone": "098-765-4321",
-                    "email": "john@example.com",
-                    "medical_history": "Regular patient since 2023"
-                },
-                {
-                    "name": "Jane Smith",
-                    "phone": "111-222-3333",
-                    "email": "jane@example.com",
-                    "medical_history": "New patient"
-                }
-            ]
-
-            added_patients = []
-            for patient in test_patients:
-                patient_id = str(uuid.uuid4())
-                cursor.execute('''
-                    INSERT INTO patients (
-                        id, name, phone, email, medical_history, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    patient_id,
-                    patient["name"],
-                    patient["phone"],
-                    patient["email"],
-                    patient["medical_history"],
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                ))
-                added_patients.append((patient_id, patient["name"]))
-
-            # Add test notes for each patient
-            for patient_id, patient_name in added_patients:
-                cursor.execute('''
-                    INSERT INTO doctor_notes (
-                        id, patient_id, medical_history, progress_notes,
-                        recommendations, next_steps, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    str(uuid.uuid4()),
-                    patient_id,
-                    f"Initial medical history for {patient_name}",
-                    "Progress is good",
-                    "Continue current treatment",
-                    "Follow up in 2 weeks",
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                ))
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                logger.debug("Checking database content...")
+
+                if cursor.execute("SELECT 1 FROM patients LIMIT 1").fetchone():
+                    logger.debug("Database already has patients, skipping test data")
+                    return
+
+                logger.debug("Adding test data...")
+                # Add test patients
+                test_patients = [
+                    {
+                        "name": "Test Patient",
+                        "phone": "123-456-7890",
+                        "email": "test@example.com",
+                        "medical_history": "Initial visit with general checkup"
+                    },
+                    {
+                        "name": "John Doe",
+                        "phone": "098-765-4321",
+                        "email": "john@example.com",
+                        "medical_history": "Regular patient since 2023"
+                    },
+                    {
+                        "name": "Jane Smith",
+                        "phone": "111-222-3333",
+                        "email": "jane@example.com",
+                        "medical_history": "New patient"
+                    }
+                ]
 
-            self.conn.commit()
-            logger.debug(f"Added {len(test_patients)} test patients with notes")
+                added_patients = []
+                for patient in test_patients:
+                    patient_id = str(uuid.uuid4())
+                    cursor.execute('''
+                        INSERT INTO patients (
+                            id, name, phone, email, medical_history, created_at,
+                            phone_normalized, phone_reversed
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        patient_id,
+                        patient["name"],
+                        patient["phone"],
+                        patient["email"],
+                        patient["medical_history"],
+                        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                        *self._phone_index_values(patient["phone"])
+                    ))
+                    added_patients.append((patient_id, patient["name"]))
+
+                # Add test notes for each patient
+                for patient_id, patient_name in added_patients:
+                    cursor.execute('''
+                        INSERT INTO doctor_notes (
+                            id, patient_id, medical_history, progress_notes,
+                            recommendations, next_steps, created_at
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        str(uuid.uuid4()),
+                        patient_id,
+                        f"Initial medical history for {patient_name}",
+                        "Progress is good",
+                        "Continue current treatment",
+                        "Follow up in 2 weeks",
+                        datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    ))
+
+                logger.debug("Added %d test patients with notes", len(test_patients))
 
         except Exception as e:
             logger.error(f"Error initializing test data: {e}")
-            self.conn.rollback()
-    def setup_logging(self):
-        logging.basicConfig(
-            filename=Config.LOG_DIR / f'db_{datetime.now().strftime("%Y%m%d")}.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
 
     @contextmanager
     def get_connection(self):
-        conn = sqlite3.connect(Config.DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        """Hold the writer connection; commits on success, rolls back on error"""
         try:
-            yield conn
-            conn.commit()
+            with self.writer.transaction() as conn:
+                yield conn
         except Exception as e:
-            conn.rollback()
             logging.error(f"Database error: {str(e)}")
             raise
-        finally:
-            conn.close()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Run a database call on a worker thread
+        Args:
+            fn: Callable to run, usually a DatabaseManager method
+        Returns:
+            Future: Resolves to fn's return value; see app.gui.components.async_result
+                for handing it back to the Tk thread
+        """
+        return self.executor.submit(fn, *args, **kwargs)
+
+    @contextmanager
+    def read_connection(self):
+        """Borrow a read-only connection from the pool"""
+        with self.pool.connection() as conn:
+            yield conn
 
     def initialize_database(self):
         """Initialize the database with tables if they don't exist"""
         with self.get_connection() as conn:
             try:
-                # Read schema from file
-                schema_path = Path(__file__).parent / 'schema.sql'
-                with open(schema_path, 'r') as f:
-                    conn.executescript(f.read())
+                migrate(conn)
                 logging.info("Database initialized successfully")
             except Exception as e:
                 logging.error(f"Error initializing database: {str(e)}")
@@ -274,39 +345,38 @@ class DatabaseManager:
 
     def get_patient_last_visit(self, patient_id):
         """Get patient's last visit date"""
-        logger.debug(f"DB: Getting last visit for patient {patient_id}")
+        logger.debug("Getting last visit for patient %s", patient_id)
 
         try:
-            cursor = self.conn.cursor()
-
-            query = """
-                SELECT MAX(visit_date) as last_visit
-                FROM (
-                    SELECT created_at as visit_date
-                    FROM doctor_notes
-                    WHERE patient_id = ?
-                    UNION ALL
-                    SELECT created_at as visit_date
-                    FROM patient_photos
-                    WHERE patient_id = ?
-                ) visits
-            """
-
-            cursor.execute(query, (patient_id, patient_id))
-            result = cursor.fetchone()
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT last_visit_at as last_visit FROM patients WHERE id = ?',
+                    (patient_id,)
+                )
+                result = cursor.fetchone()
 
-            if result and result['last_visit']:
-                logger.debug(f"DB: Found last visit date: {result['last_visit']}")
-                return datetime.strptime(result['last_visit'], '%Y-%m-%d %H:%M:%S')
+                if result and result['last_visit']:
+                    logger.debug("Last visit: %s", result['last_visit'])
+                    return _parse_timestamp(result['last_visit'])
 
-            logger.debug("DB: No visits found")
-            return None
+                logger.debug("No visits found")
+                return None
 
         except Exception as e:
             logger.error(f"DB: Error getting last visit: {e}")
             return None
 
-
+    def rebuild_last_visits(self):
+        """Recompute every patient's last visit date from notes and photos"""
+        try:
+            with self.get_connection() as conn:
+                updated = rebuild_last_visits(conn)
+            logger.info("Rebuilt last visit dates for %d patients", updated)
+            return updated
+        except Exception as e:
+            logger.error(f"Error rebuilding last visits: {e}")
+            raise
 
     # Service management methods
     def add_service(self, service: Service) -> str:
@@ -323,16 +393,17 @@ class DatabaseManager:
                 service.description, service.category, service.duration,
                 service.active, datetime.now(), datetime.now()
             ))
-            return service_id
+        self.catalog.invalidate()
+        return service_id
+
+    def get_service(self, service_id: str) -> Optional[Service]:
+        return self.catalog.get_service(service_id)
+
+    def get_all_services(self) -> List[Service]:
+        return self.catalog.get_services()
 
     def get_services_by_category(self, category: str) -> List[Service]:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            result = cursor.execute(
-                'SELECT * FROM services WHERE category = ? AND active = 1',
-                (category,)
-            )
-            return [Service(**dict(row)) for row in result.fetchall()]
+        return self.catalog.get_services(category=category)
 
     # Transaction management methods
     def create_transaction(self, transaction: Transaction) -> str:
@@ -357,23 +428,25 @@ class DatabaseManager:
             ))
 
             # Insert transaction items
-            for item in transaction.items:
-                cursor.execute('''
-                    INSERT INTO transaction_items (
-                        id, transaction_id, service_id, quantity,
-                        price, discount, notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
+            cursor.executemany('''
+                INSERT INTO transaction_items (
+                    id, transaction_id, service_id, doctor_id, quantity,
+                    price, discount, notes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
                     str(uuid.uuid4()), transaction_id,
-                    item.service_id, item.quantity,
+                    item.service_id, item.doctor_id, item.quantity,
                     float(item.price), float(item.discount),
                     item.notes
-                ))
+                )
+                for item in transaction.items
+            ])
 
             return transaction_id
 
     def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
-        with self.get_connection() as conn:
+        with self.read_connection() as conn:
             cursor = conn.cursor()
 
             # Get main transaction
@@ -390,12 +463,87 @@ class DatabaseManager:
                 'SELECT * FROM transaction_items WHERE transaction_id = ?',
                 (transaction_id,)
             )
-            items = [TransactionItem(**dict(row)) for row in items_result]
+            items = [TransactionItem.from_row(row) for row in items_result]
+            return Transaction.from_row(trans_row, items)
 
-            # Create transaction object
-            trans_dict = dict(trans_row)
-            trans_dict['items'] = items
-            return Transaction(**trans_dict)
+    def get_transaction_ids(self, start_date, end_date):
+        """
+        IDs of the transactions made between two dates, oldest first
+        Args:
+            start_date (date): First day included
+            end_date (date): Last day included
+        """
+        with self.read_connection() as conn:
+            rows = conn.execute('''
+                SELECT id FROM transactions
+                WHERE transaction_date >= ? AND transaction_date < ?
+                ORDER BY transaction_date, id
+            ''', (start_date.isoformat(), (end_date + timedelta(days=1)).isoformat())).fetchall()
+        return [row[0] for row in rows]
+
+    def get_invoice_data(self, transaction_ids):
+        """
+        Load everything an invoice shows for many transactions in one query
+        Args:
+            transaction_ids (list): Transactions to load
+        Returns:
+            dict: Transaction ID to invoice data (see InvoiceGenerator), in the
+                order requested; unknown IDs are left out
+        """
+        # A repeated ID would join its items in twice
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        if not transaction_ids:
+            return {}
+
+        with self.read_connection() as conn:
+            rows = conn.execute('''
+                SELECT t.id, t.transaction_date, t.total_amount, t.payment_method,
+                       t.discount_amount, t.tax_amount,
+                       p.name AS patient_name, p.phone AS patient_phone,
+                       p.email AS patient_email,
+                       ti.id AS item_id, ti.quantity, ti.price, ti.discount,
+                       s.name AS service_name, s.description AS service_description
+                FROM json_each(?) AS requested
+                JOIN transactions t ON t.id = requested.value
+                LEFT JOIN patients p ON p.id = t.patient_id
+                LEFT JOIN transaction_items ti ON ti.transaction_id = t.id
+                LEFT JOIN services s ON s.id = ti.service_id
+                ORDER BY requested.key, ti.rowid
+            ''', (json.dumps(transaction_ids),)).fetchall()
+
+        invoices = {}
+        for row in rows:
+            invoice = invoices.get(row['id'])
+            if invoice is None:
+                invoice = invoices[row['id']] = {
+                    'transaction_id': row['id'],
+                    'invoice_number': row['id'],
+                    'date': row['transaction_date'],
+                    'payment_method': row['payment_method'],
+                    'patient_name': row['patient_name'] or '',
+                    'patient_phone': row['patient_phone'] or '',
+                    'patient_email': row['patient_email'] or '',
+                    'items': [],
+                    'subtotal': Decimal('0'),
+                    'discount_amount': Decimal(str(row['discount_amount'] or 0)),
+                    'tax_amount': Decimal(str(row['tax_amount'] or 0)),
+                    'total_amount': Decimal(str(row['total_amount'])),
+                }
+            if row['item_id'] is None:
+                continue
+            price = Decimal(str(row['price']))
+            total = price * row['quantity']
+            invoice['items'].append({
+                'service': row['service_name'] or '',
+                'description': row['service_description'] or '',
+                'quantity': row['quantity'],
+                'price': price,
+                'discount': Decimal(str(row['discount'] or 0)),
+                'total': total,
+            })
+            invoice['subtotal'] += total
+
+        return invoices
 
     # Appointment management methods
     def create_appointment(self, appointment: Appointment) -> str:
@@ -404,19 +552,19 @@ class DatabaseManager:
             appointment_id = str(uuid.uuid4())
             cursor.execute('''
                 INSERT INTO appointments (
-                    id, patient_id, service_id, start_time,
+                    id, patient_id, service_id, doctor_id, start_time,
                     end_time, status, notes, created_at, modified_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 appointment_id, appointment.patient_id,
-                appointment.service_id, appointment.start_time,
+                appointment.service_id, appointment.doctor_id, appointment.start_time,
                 appointment.end_time, appointment.status,
                 appointment.notes, datetime.now(), datetime.now()
             ))
             return appointment_id
 
     def get_appointments_by_date(self, date: datetime) -> List[Appointment]:
-        with self.get_connection() as conn:
+        with self.read_connection() as conn:
             cursor = conn.cursor()
             start_of_day = date.replace(hour=0, minute=0, second=0)
             end_of_day = date.replace(hour=23, minute=59, second=59)
@@ -427,7 +575,7 @@ class DatabaseManager:
                 ORDER BY start_time
             ''', (start_of_day, end_of_day))
 
-            return [Appointment(**dict(row)) for row in result.fetchall()]
+            return [Appointment.from_row(row) for row in result.fetchall()]
 
     # Staff management methods
     def add_staff(self, staff: Staff) -> str:
@@ -443,42 +591,203 @@ class DatabaseManager:
                 staff_id, staff.name, staff.email, staff.phone,
                 staff.role, staff.active, datetime.now(), datetime.now()
             ))
-            return staff_id
+        self.catalog.invalidate()
+        return staff_id
+
+    def get_staff(self, staff_id: str) -> Optional[Staff]:
+        return self.catalog.get_staff(staff_id)
+
+    def get_doctors_for_service(self, service_id: str) -> List[Staff]:
+        return self.catalog.get_doctors_for_service(service_id)
 
     def get_active_staff(self) -> List[Staff]:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            result = cursor.execute('SELECT * FROM staff WHERE active = 1')
-            return [Staff(**dict(row)) for row in result.fetchall()]
+        return self.catalog.get_active_staff()
 
     def get_all_patients(self):
-        """Retrieve all patients from the database"""
+        """Retrieve all patients from the database as PatientRows, ordered by name"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT id, name, phone, email, address, birth_date,
-                       gender, emergency_contact, medical_history, notes,
-                       created_at, updated_at
-                FROM patients 
-                ORDER BY name ASC
-            ''')
-
-            rows = cursor.fetchall()
-            patients = []
-
-            for row in rows:
-                # Convert row to dictionary
-                patient_dict = dict(row)
-                logger.debug(f"Processing patient: {patient_dict['name']}")
-                patients.append(patient_dict)
-
-            logger.debug(f"Retrieved {len(patients)} patients")
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = _patient_row
+                cursor.execute(f'''
+                    SELECT {PATIENT_COLUMNS}
+                    FROM patients p
+                    ORDER BY p.name ASC
+                ''')
+                patients = cursor.fetchall()
+
+            logger.debug("Retrieved %d patients", len(patients))
             return patients
 
         except Exception as e:
             logger.error(f"Error retrieving patients: {e}")
             return []
 
+    def _keyset_rows(self, table, columns, keys, after=None, descending=False, limit=100,
+                     filters=(), params=(), row_factory=None):
+        """
+        Fetch rows after a keyset cursor
+        Args:
+            table (str): Table to read
+            columns (str): Select list; must include the key columns
+            keys (tuple): Sort columns, ending in a unique column (e.g. ('name', 'id'))
+            after (tuple): Key values of the last row already seen
+            descending (bool): Walk the keys in descending order
+            limit (int): Maximum number of rows
+            filters (tuple): Extra SQL conditions, ANDed together
+            params (tuple): Parameters for the filters
+            row_factory: sqlite3 row factory for the result rows
+        """
+        conditions = list(filters)
+        values = list(params)
+        if after is not None:
+            # Row-value comparison lets SQLite seek straight to the cursor in
+            # an index on the key columns, so every page costs the same
+            placeholders = ', '.join('?' for _ in keys)
+            conditions.append(f"({', '.join(keys)}) {'<' if descending else '>'} ({placeholders})")
+            values.extend(after)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = 'DESC' if descending else 'ASC'
+        order_by = ', '.join(f'{key} {direction}' for key in keys)
+
+        with self.read_connection() as conn:
+            cursor = conn.cursor()
+            if row_factory is not None:
+                cursor.row_factory = row_factory
+            return cursor.execute(
+                f'SELECT {columns} FROM {table} {where} ORDER BY {order_by} LIMIT ?',
+                (*values, limit)
+            ).fetchall()
+
+    def _keyset_page(self, table, columns, orders, order, after, before, limit, make_row=None,
+                     filters=(), params=(), row_factory=None):
+        """
+        Fetch one Page for the iter_* methods; see _keyset_rows
+        after and before are cursor tokens; with before, the page is the rows
+        just ahead of that cursor, still in the requested order. make_row
+        converts each fetched row; the key columns must be readable as
+        attributes of the result
+        """
+        descending = order.startswith('-')
+        keys = orders.get(order.lstrip('-'))
+        if keys is None:
+            raise ValueError(f"Unsupported order for {table}: {order!r}")
+
+        # One extra row tells whether there is a further page; walking
+        # backwards from before, the page is flipped back around afterwards
+        backwards = before is not None
+        cursor = before if backwards else after
+        rows = self._keyset_rows(
+            table, columns, keys,
+            after=decode_cursor(cursor) if cursor else None,
+            descending=descending != backwards, limit=limit + 1,
+            filters=filters, params=params, row_factory=row_factory
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        if make_row is not None:
+            rows = [make_row(row) for row in rows]
+        if not rows:
+            return Page(rows, None, None)
+
+        # A cursor passed in means there are rows on that side of the page
+        first = encode_cursor([getattr(rows[0], key) for key in keys])
+        last = encode_cursor([getattr(rows[-1], key) for key in keys])
+        if backwards:
+            return Page(rows, last, first if has_more else None)
+        return Page(rows, last if has_more else None, first if after else None)
+
+    @staticmethod
+    def _row_cursor(row, orders, order):
+        keys = orders[order.lstrip('-')]
+        return encode_cursor([getattr(row, key) for key in keys])
+
+    def iter_patients(self, after=None, before=None, limit=PATIENT_PAGE_SIZE, order='name'):
+        """
+        Get one page of patients, with last visit dates
+        Args:
+            after (str): Cursor token; the page starts after it (None for the first page)
+            before (str): Cursor token; the page ends just before it
+            limit (int): Page size
+            order (str): One of PATIENT_ORDERS, prefixed with '-' for descending
+        Returns:
+            Page: PatientRows and the cursors of the neighbouring pages
+        """
+        return self._keyset_page(
+            'patients p', PATIENT_COLUMNS, PATIENT_ORDERS, order, after, before, limit,
+            row_factory=_patient_row
+        )
+
+    def patient_cursor(self, patient, order='name'):
+        """Cursor token of a PatientRow, to page on from it with iter_patients"""
+        return self._row_cursor(patient, PATIENT_ORDERS, order)
+
+    def iter_staff(self, after=None, before=None, limit=CATALOG_PAGE_SIZE, order='name',
+                   active_only=True):
+        """
+        Get one page of staff members
+        Returns:
+            Page: Staff objects and the cursors of the neighbouring pages
+        """
+        return self._keyset_page(
+            'staff', '*', STAFF_ORDERS, order, after, before, limit,
+            make_row=Staff.from_row,
+            filters=('active = 1',) if active_only else ()
+        )
+
+    def staff_cursor(self, staff, order='name'):
+        """Cursor token of a Staff object, to page on from it with iter_staff"""
+        return self._row_cursor(staff, STAFF_ORDERS, order)
+
+    def iter_services(self, after=None, before=None, limit=CATALOG_PAGE_SIZE, order='name',
+                      category=None, active_only=True):
+        """
+        Get one page of services, optionally within one category
+        Returns:
+            Page: Service objects and the cursors of the neighbouring pages
+        """
+        filters = []
+        params = []
+        if category is not None:
+            filters.append('category = ?')
+            params.append(category)
+        if active_only:
+            filters.append('active = 1')
+
+        return self._keyset_page(
+            'services', '*', SERVICE_ORDERS, order, after, before, limit,
+            make_row=Service.from_row, filters=filters, params=params
+        )
+
+    def service_cursor(self, service, order='name'):
+        """Cursor token of a Service object, to page on from it with iter_services"""
+        return self._row_cursor(service, SERVICE_ORDERS, order)
+
+    def stream(self, iter_page, page_size=STREAM_PAGE_SIZE, **kwargs):
+        """
+        Yield every row of an iter_* query, fetching one page at a time
+        Args:
+            iter_page: e.g. self.iter_patients
+            page_size (int): Rows fetched per query
+            **kwargs: Passed on to iter_page (order, category, ...)
+        """
+        after = None
+        while True:
+            page = iter_page(after=after, limit=page_size, **kwargs)
+            yield from page.rows
+            if page.next_cursor is None:
+                return
+            after = page.next_cursor
+
+    @staticmethod
+    def _phone_index_values(phone):
+        """Normalized and reversed forms of a phone number, for the phone indexes"""
+        normalized = normalize_phone(phone)
+        return normalized, reversed_phone(normalized)
+
     def add_patient(self, data):
         """
         Add a new patient to the database
@@ -487,165 +796,189 @@ class DatabaseManager:
         Returns:
             str: The ID of the newly created patient
         """
-        logger.debug(f"Adding new patient: {data}")
         try:
-            cursor = self.conn.cursor()
-            query = """
-                INSERT INTO patients (
-                    id, name, phone, email, address,
-                    birth_date, gender, emergency_contact,
-                    medical_history, notes, created_at, updated_at
-                ) VALUES (
-                    ?, ?, ?, ?, ?,
-                    ?, ?, ?, ?, ?,
-                    ?, ?
-                )
-            """
-
-            values = [
-                data['id'],
-                data['name'],
-                data['phone'],
-                data.get('email', ''),
-                data.get('address', ''),
-                data.get('birth_date', ''),
-                data.get('gender', ''),
-                data.get('emergency_contact', ''),
-                data.get('medical_history', ''),
-                data.get('notes', ''),
-                data['created_at'],
-                data['updated_at']
-            ]
-
-            logger.debug(f"Executing query with values: {values}")
-            cursor.execute(query, values)
-
-            if data.get('medical_history'):
-                notes_query = """
-                    INSERT INTO doctor_notes (
-                        id, patient_id, medical_history, created_at
-                    ) VALUES (?, ?, ?, ?)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                query = """
+                    INSERT INTO patients (
+                        id, name, phone, email, address,
+                        birth_date, gender, emergency_contact,
+                        medical_history, notes, created_at, updated_at,
+                        phone_normalized, phone_reversed
+                    ) VALUES (
+                        ?, ?, ?, ?, ?,
+                        ?, ?, ?, ?, ?,
+                        ?, ?, ?, ?
+                    )
                 """
-                notes_values = [
-                    str(uuid.uuid4()),
+
+                values = [
                     data['id'],
-                    data['medical_history'],
-                    data['created_at']
+                    data['name'],
+                    data['phone'],
+                    data.get('email', ''),
+                    data.get('address', ''),
+                    data.get('birth_date', ''),
+                    data.get('gender', ''),
+                    data.get('emergency_contact', ''),
+                    data.get('medical_history', ''),
+                    data.get('notes', ''),
+                    data['created_at'],
+                    data['updated_at'],
+                    *self._phone_index_values(data['phone'])
                 ]
-                cursor.execute(notes_query, notes_values)
 
-            self.conn.commit()
-            logger.info(f"Successfully added patient with ID: {data['id']}")
-            return data['id']
+                cursor.execute(query, values)
+
+                if data.get('medical_history'):
+                    notes_query = """
+                        INSERT INTO doctor_notes (
+                            id, patient_id, medical_history, created_at
+                        ) VALUES (?, ?, ?, ?)
+                    """
+                    notes_values = [
+                        str(uuid.uuid4()),
+                        data['id'],
+                        data['medical_history'],
+                        data['created_at']
+                    ]
+                    cursor.execute(notes_query, notes_values)
+
+                logger.info("Added patient %s", data['id'])
+                return data['id']
 
         except Exception as e:
             logger.error(f"Error in add_patient: {str(e)}", exc_info=True)
-            self.conn.rollback()
             raise
 
     def update_patient(self, patient_data):
         """Update patient information"""
-        logger.debug(f"Updating patient: {patient_data['id']}")
+        logger.debug("Updating patient %s", patient_data['id'])
         try:
-            cursor = self.conn.cursor()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
 
-            cursor.execute('''
-                UPDATE patients 
-                SET name = ?, 
-                    phone = ?,
-                    email = ?,
-                    address = ?,
-                    birth_date = ?,
-                    gender = ?,
-                    emergency_contact = ?,
-                    medical_history = ?,
-                    notes = ?,
-                    updated_at = ?
-                WHERE id = ?
-            ''', (
-                patient_data['name'],
-                patient_data['phone'],
-                patient_data.get('email', ''),
-                patient_data.get('address', ''),
-                patient_data.get('birth_date', ''),
-                patient_data.get('gender', ''),
-                patient_data.get('emergency_contact', ''),
-                patient_data.get('medical_history', ''),
-                patient_data.get('notes', ''),
-                patient_data['updated_at'],
-                patient_data['id']
-            ))
+                cursor.execute('''
+                    UPDATE patients 
+                    SET name = ?, 
+                        phone = ?,
+                        email = ?,
+                        address = ?,
+                        birth_date = ?,
+                        gender = ?,
+                        emergency_contact = ?,
+                        medical_history = ?,
+                        notes = ?,
+                        updated_at = ?,
+                        phone_normalized = ?,
+                        phone_reversed = ?
+                    WHERE id = ?
+                ''', (
+                    patient_data['name'],
+                    patient_data['phone'],
+                    patient_data.get('email', ''),
+                    patient_data.get('address', ''),
+                    patient_data.get('birth_date', ''),
+                    patient_data.get('gender', ''),
+                    patient_data.get('emergency_contact', ''),
+                    patient_data.get('medical_history', ''),
+                    patient_data.get('notes', ''),
+                    patient_data['updated_at'],
+                    *self._phone_index_values(patient_data['phone']),
+                    patient_data['id']
+                ))
 
-            self.conn.commit()
-            logger.debug(f"Patient updated successfully")
-            return True
+                return True
 
         except Exception as e:
             logger.error(f"Error updating patient: {e}")
-            self.conn.rollback()
             return False
 
 
-    def search_patients(self, search_term):
-        """Search patients by name or phone number"""
-        logger.debug(f"DB: Searching for patients with term: {search_term}")
-
+    def search_patients(self, search_term, limit=SEARCH_RESULT_LIMIT):
+        """
+        Search patients by name, phone number or email
+        Args:
+            search_term (str): Text typed by the user, matched anywhere in the fields
+            limit (int): Maximum number of results, best matches first
+        Returns:
+            list: PatientRows
+        """
         try:
-            cursor = self.conn.cursor()
-            search_pattern = f"%{search_term}%"
-
-            query = """
-                SELECT id, name, phone, email, address, medical_history, created_at
-                FROM patients 
-                WHERE name LIKE ? OR phone LIKE ?
-                ORDER BY name
-            """
-
-            cursor.execute(query, (search_pattern, search_pattern))
-            rows = cursor.fetchall()
-            logger.debug(f"DB: Found {len(rows)} matching patients")
-
-            # Convert rows to list of Patient-like objects
-            patients = []
-            for row in rows:
-                row_dict = dict(row)  # Convert sqlite3.Row to dictionary first
-                patient = type('Patient', (), {
-                    'id': row_dict['id'],
-                    'name': row_dict['name'],
-                    'phone': row_dict['phone'],
-                    'email': row_dict['email'],
-                    'address': row_dict.get('address'),
-                    'medical_history': row_dict.get('medical_history'),
-                    'created_at': row_dict.get('created_at')
-                })
-                logger.debug(f"DB: Found patient: {patient.name}")
-                patients.append(patient)
-
-            return patients
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = _patient_row
+                search_term = search_term.strip()
+
+                if is_phone_query(search_term):
+                    self._search_patients_by_phone(cursor, search_term, limit)
+                # Trigrams need at least three characters; shorter terms fall
+                # back to a (limited) LIKE scan
+                elif self.patient_search_enabled and len(search_term) >= 3:
+                    phrase = '"' + search_term.replace('"', '""') + '"'
+                    cursor.execute(f"""
+                        SELECT {PATIENT_COLUMNS}
+                        FROM patients_fts
+                        JOIN patients p ON p.rowid = patients_fts.rowid
+                        WHERE patients_fts MATCH ?
+                        ORDER BY bm25(patients_fts, 10.0, 5.0, 1.0), p.name
+                        LIMIT ?
+                    """, (phrase, limit))
+                else:
+                    search_pattern = f"%{search_term}%"
+                    cursor.execute(f"""
+                        SELECT {PATIENT_COLUMNS}
+                        FROM patients p
+                        WHERE p.name LIKE ? OR p.phone LIKE ? OR p.email LIKE ?
+                        ORDER BY p.name
+                        LIMIT ?
+                    """, (search_pattern, search_pattern, search_pattern, limit))
+
+                patients = cursor.fetchall()
+                logger.debug("Patient search matched %d rows", len(patients))
+                return patients
 
         except Exception as e:
             logger.error(f"DB: Error searching patients: {e}")
             return []
 
+    def _search_patients_by_phone(self, cursor, search_term, limit):
+        """
+        Run an indexed phone lookup for a digit-only search term
+        Matches numbers starting with the typed digits (in stored, E.164 or
+        national form) or ending with them.
+        """
+        # GLOB on a BINARY column is answered with an index range scan
+        prefixes = phone_query_prefixes(search_term)
+        conditions = ["p.phone_normalized GLOB ?"] * len(prefixes) + ["p.phone_reversed GLOB ?"]
+        params = [prefix + '*' for prefix in prefixes] + [reversed_phone(search_term) + '*']
+
+        cursor.execute(f"""
+            SELECT {PATIENT_COLUMNS}
+            FROM patients p
+            WHERE {' OR '.join(conditions)}
+            ORDER BY p.name
+            LIMIT ?
+        """, (*params, limit))
+
     def get_patient_by_name(self, name):
-        """Get patient by exact name"""
+        """Get patient by exact name as a PatientRow, or None"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('SELECT * FROM patients WHERE name = ?', (name,))
-            row = cursor.fetchone()
-            if row:
-                # Convert row to dictionary
-                row_dict = dict(row)
-                # Return dictionary directly
-                return row_dict
-            return None
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = _patient_row
+                cursor.execute(
+                    f'SELECT {PATIENT_COLUMNS} FROM patients p WHERE p.name = ?',
+                    (name,)
+                )
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Error getting patient by name: {e}")
             return None
 
     def get_patient_history(self, patient_id: str) -> dict:
         """Get a patient's complete history including treatments and appointments"""
-        with self.get_connection() as conn:
+        with self.read_connection() as conn:
             cursor = conn.cursor()
             try:
                 # Get patient details
@@ -679,15 +1012,16 @@ class DatabaseManager:
     def get_patient_notes(self, patient_id):
         """Get the most recent notes for a patient"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT * FROM doctor_notes
-                WHERE patient_id = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (patient_id,))
-            row = cursor.fetchone()
-            return dict(row) if row else None
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT * FROM doctor_notes
+                    WHERE patient_id = ?
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                ''', (patient_id,))
+                row = cursor.fetchone()
+                return dict(row) if row else None
         except Exception as e:
             logger.error(f"Error getting patient notes: {e}")
             return None
@@ -695,32 +1029,68 @@ class DatabaseManager:
     def save_doctor_notes(self, notes_data):
         """Save doctor's notes"""
         try:
-            cursor = self.conn.cursor()
-            notes_data['id'] = str(uuid.uuid4())
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                notes_data['id'] = str(uuid.uuid4())
 
-            cursor.execute('''
-                INSERT INTO doctor_notes (
-                    id, patient_id, medical_history, progress_notes,
-                    recommendations, next_steps, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                notes_data['id'],
-                notes_data['patient_id'],
-                notes_data.get('medical_history', ''),
-                notes_data.get('progress_notes', ''),
-                notes_data.get('recommendations', ''),
-                notes_data.get('next_steps', ''),
-                notes_data['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            ))
+                cursor.execute('''
+                    INSERT INTO doctor_notes (
+                        id, patient_id, medical_history, progress_notes,
+                        recommendations, next_steps, created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    notes_data['id'],
+                    notes_data['patient_id'],
+                    notes_data.get('medical_history', ''),
+                    notes_data.get('progress_notes', ''),
+                    notes_data.get('recommendations', ''),
+                    notes_data.get('next_steps', ''),
+                    notes_data['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+                ))
 
-            self.conn.commit()
 
         except Exception as e:
             logger.error(f"Error saving doctor notes: {e}")
-            self.conn.rollback()
             raise
 
+    def add_patient_photos(self, patient_id, photo_paths, photo_type='progress'):
+        """Record photos for a patient in a single transaction"""
+        try:
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            with self.get_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO patient_photos (
+                        id, patient_id, photo_path, photo_type, created_at
+                    ) VALUES (?, ?, ?, ?, ?)
+                ''', [
+                    (str(uuid.uuid4()), patient_id, photo_path, photo_type, now)
+                    for photo_path in photo_paths
+                ])
+
+        except Exception as e:
+            logger.error(f"Error adding patient photos: {e}")
+            raise
+
+    def get_patient_photos(self, patient_id):
+        """Get all photo paths for a patient, newest first"""
+        try:
+            with self.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT photo_path FROM patient_photos
+                    WHERE patient_id = ?
+                    ORDER BY created_at DESC
+                ''', (patient_id,))
+                return [row['photo_path'] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error getting patient photos: {e}")
+            return []
+
     def close(self):
-        """Close database connection"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
\ No newline at end of file
+        """Stop the worker threads and close all database connections"""
+        if hasattr(self, 'executor'):
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        if hasattr(self, 'pool'):
+            self.pool.close()
+        if hasattr(self, 'writer'):
+            self.writer.close()
\ No newline at end of file
@@ -0,0 +1,520 @@
+"""Database maintenance helpers and command line entry point.
+
+Usage:
+    python -m app.database.maintenance rebuild-last-visits [--db PATH]
+    python -m app.database.maintenance rebuild-search-index [--db PATH]
+    python -m app.database.maintenance rebuild-phone-index [--db PATH]
+    python -m app.database.maintenance rebuild-sales-rollup [--db PATH]
+    python -m app.database.maintenance migrate [--db PATH]
+"""
+import argparse
+import logging
+import sqlite3
+
+from config import Config
+from app.utils.phone import normalize_phone, reversed_phone
+from .connection import execute_script, open_connection
+
+logger = logging.getLogger(__name__)
+
+# Keep patients.last_visit_at equal to the newest doctor note / photo date.
+# Inserts only ever move the date forward; deletes recompute it, but only
+# when the deleted row was the one that set the current value.
+LAST_VISIT_TRACKING_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_patients_last_visit ON patients(last_visit_at);
+    CREATE INDEX IF NOT EXISTS idx_doctor_notes_patient ON doctor_notes(patient_id, created_at);
+    CREATE INDEX IF NOT EXISTS idx_patient_photos_patient ON patient_photos(patient_id, created_at);
+
+    CREATE TRIGGER IF NOT EXISTS trg_doctor_notes_last_visit_insert
+    AFTER INSERT ON doctor_notes
+    BEGIN
+        UPDATE patients
+        SET last_visit_at = NEW.created_at
+        WHERE id = NEW.patient_id
+          AND (last_visit_at IS NULL OR last_visit_at < NEW.created_at);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_patient_photos_last_visit_insert
+    AFTER INSERT ON patient_photos
+    BEGIN
+        UPDATE patients
+        SET last_visit_at = NEW.created_at
+        WHERE id = NEW.patient_id
+          AND (last_visit_at IS NULL OR last_visit_at < NEW.created_at);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_doctor_notes_last_visit_delete
+    AFTER DELETE ON doctor_notes
+    BEGIN
+        UPDATE patients
+        SET last_visit_at = (
+            SELECT MAX(visit_date) FROM (
+                SELECT created_at as visit_date FROM doctor_notes WHERE patient_id = OLD.patient_id
+                UNION ALL
+                SELECT created_at as visit_date FROM patient_photos WHERE patient_id = OLD.patient_id
+            )
+        )
+        WHERE id = OLD.patient_id AND last_visit_at = OLD.created_at;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_patient_photos_last_visit_delete
+    AFTER DELETE ON patient_photos
+    BEGIN
+        UPDATE patients
+        SET last_visit_at = (
+            SELECT MAX(visit_date) FROM (
+                SELECT created_at as visit_date FROM doctor_notes WHERE patient_id = OLD.patient_id
+                UNION ALL
+                SELECT created_at as visit_date FROM patient_photos WHERE patient_id = OLD.patient_id
+            )
+        )
+        WHERE id = OLD.patient_id AND last_visit_at = OLD.created_at;
+    END;
+'''
+
+
+# Trigram full-text index over the searchable patient fields. It is an
+# external-content table keyed on patients.rowid, so it stores only the
+# index itself; the triggers below keep it in sync with every write.
+PATIENT_SEARCH_INDEX_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        name, phone, email,
+        content='patients',
+        content_rowid='rowid',
+        tokenize='trigram'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_patients_fts_insert
+    AFTER INSERT ON patients
+    BEGIN
+        INSERT INTO patients_fts (rowid, name, phone, email)
+        VALUES (NEW.rowid, NEW.name, NEW.phone, NEW.email);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_patients_fts_delete
+    AFTER DELETE ON patients
+    BEGIN
+        INSERT INTO patients_fts (patients_fts, rowid, name, phone, email)
+        VALUES ('delete', OLD.rowid, OLD.name, OLD.phone, OLD.email);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_patients_fts_update
+    AFTER UPDATE OF name, phone, email ON patients
+    BEGIN
+        INSERT INTO patients_fts (patients_fts, rowid, name, phone, email)
+        VALUES ('delete', OLD.rowid, OLD.name, OLD.phone, OLD.email);
+        INSERT INTO patients_fts (rowid, name, phone, email)
+        VALUES (NEW.rowid, NEW.name, NEW.phone, NEW.email);
+    END;
+'''
+
+
+# phone_normalized holds the E.164 (or digits-only) form for prefix lookups;
+# phone_reversed holds its digits backwards so suffix lookups ("last four
+# digits") are prefix lookups too. Both are filled in by DatabaseManager.
+PHONE_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_patients_phone_normalized ON patients(phone_normalized);
+    CREATE INDEX IF NOT EXISTS idx_patients_phone_reversed ON patients(phone_reversed);
+'''
+
+
+# Per-day sales kept up to date by triggers, so reports read one row per
+# day and key instead of every transaction. daily_sales_totals holds the
+# transaction-level amounts per payment method; daily_sales_rollup holds
+# item sales per service and doctor (staff_id '' when none was chosen).
+# Only completed transactions are counted.
+#
+# As shipped in schema version 9: inserts, plus status changes moving a
+# transaction in or out. SALES_ROLLUP_TRIGGERS_SQL replaces the triggers.
+SALES_ROLLUP_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_sales_totals (
+        sale_date TEXT NOT NULL,
+        payment_method TEXT NOT NULL,
+        transactions INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        discounts REAL NOT NULL DEFAULT 0,
+        tax REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (sale_date, payment_method)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS daily_sales_rollup (
+        sale_date TEXT NOT NULL,
+        service_id TEXT NOT NULL,
+        staff_id TEXT NOT NULL DEFAULT '',
+        payment_method TEXT NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (sale_date, service_id, staff_id, payment_method)
+    ) WITHOUT ROWID;
+
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert
+    AFTER INSERT ON transactions
+    WHEN NEW.status = 'completed'
+    BEGIN
+        INSERT INTO daily_sales_totals (sale_date, payment_method, transactions, revenue, discounts, tax)
+        VALUES (
+            substr(NEW.transaction_date, 1, 10), NEW.payment_method, 1, NEW.total_amount,
+            COALESCE(NEW.discount_amount, 0), COALESCE(NEW.tax_amount, 0)
+        )
+        ON CONFLICT (sale_date, payment_method) DO UPDATE SET
+            transactions = transactions + excluded.transactions,
+            revenue = revenue + excluded.revenue,
+            discounts = discounts + excluded.discounts,
+            tax = tax + excluded.tax;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_transaction_items_rollup_insert
+    AFTER INSERT ON transaction_items
+    BEGIN
+        INSERT INTO daily_sales_rollup (sale_date, service_id, staff_id, payment_method, quantity, revenue)
+        SELECT substr(t.transaction_date, 1, 10), NEW.service_id, COALESCE(NEW.doctor_id, ''),
+               t.payment_method, NEW.quantity, NEW.quantity * NEW.price - COALESCE(NEW.discount, 0)
+        FROM transactions t
+        WHERE t.id = NEW.transaction_id AND t.status = 'completed'
+        ON CONFLICT (sale_date, service_id, staff_id, payment_method) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_status
+    AFTER UPDATE OF status ON transactions
+    WHEN (OLD.status = 'completed') != (NEW.status = 'completed')
+    BEGIN
+        INSERT INTO daily_sales_totals (sale_date, payment_method, transactions, revenue, discounts, tax)
+        SELECT substr(NEW.transaction_date, 1, 10), NEW.payment_method, sign, sign * NEW.total_amount,
+               sign * COALESCE(NEW.discount_amount, 0), sign * COALESCE(NEW.tax_amount, 0)
+        FROM (SELECT CASE WHEN NEW.status = 'completed' THEN 1 ELSE -1 END AS sign)
+        WHERE true
+        ON CONFLICT (sale_date, payment_method) DO UPDATE SET
+            transactions = transactions + excluded.transactions,
+            revenue = revenue + excluded.revenue,
+            discounts = discounts + excluded.discounts,
+            tax = tax + excluded.tax;
+
+        INSERT INTO daily_sales_rollup (sale_date, service_id, staff_id, payment_method, quantity, revenue)
+        SELECT substr(NEW.transaction_date, 1, 10), ti.service_id, COALESCE(ti.doctor_id, ''),
+               NEW.payment_method,
+               CASE WHEN NEW.status = 'completed' THEN 1 ELSE -1 END * ti.quantity,
+               CASE WHEN NEW.status = 'completed' THEN 1 ELSE -1 END
+                   * (ti.quantity * ti.price - COALESCE(ti.discount, 0))
+        FROM transaction_items ti
+        WHERE ti.transaction_id = NEW.id
+        ON CONFLICT (sale_date, service_id, staff_id, payment_method) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue;
+    END;
+'''
+
+
+# Schema version 10: every insert, update and delete of a transaction or
+# item first takes the old row's contribution out and then puts the new one
+# in, so refunds, corrections and cleanups all keep the rollup equal to what
+# rebuild_sales_rollup() would produce. Each trigger is dropped before it is
+# created, so databases that already have a trigger of the same name get
+# this body.
+_TOTALS_UPSERT = '''
+        ON CONFLICT (sale_date, payment_method) DO UPDATE SET
+            transactions = transactions + excluded.transactions,
+            revenue = revenue + excluded.revenue,
+            discounts = discounts + excluded.discounts,
+            tax = tax + excluded.tax;'''
+
+_ROLLUP_UPSERT = '''
+        ON CONFLICT (sale_date, service_id, staff_id, payment_method) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue;'''
+
+
+def _transaction_totals(row, sign):
+    """Trigger statement adding (sign 1) or removing (sign -1) a transaction (NEW/OLD) from the totals"""
+    return f'''
+        INSERT INTO daily_sales_totals (sale_date, payment_method, transactions, revenue, discounts, tax)
+        SELECT substr({row}.transaction_date, 1, 10), {row}.payment_method, {sign},
+               {sign} * {row}.total_amount, {sign} * COALESCE({row}.discount_amount, 0),
+               {sign} * COALESCE({row}.tax_amount, 0)
+        WHERE {row}.status = 'completed'{_TOTALS_UPSERT}'''
+
+
+def _transaction_items(row, sign):
+    """Trigger statement adding or removing the items of a transaction (NEW/OLD) in the rollup"""
+    return f'''
+        INSERT INTO daily_sales_rollup (sale_date, service_id, staff_id, payment_method, quantity, revenue)
+        SELECT substr({row}.transaction_date, 1, 10), ti.service_id, COALESCE(ti.doctor_id, ''),
+               {row}.payment_method, {sign} * ti.quantity,
+               {sign} * (ti.quantity * ti.price - COALESCE(ti.discount, 0))
+        FROM transaction_items ti
+        WHERE ti.transaction_id = {row}.id AND {row}.status = 'completed'{_ROLLUP_UPSERT}'''
+
+
+def _item(row, sign):
+    """Trigger statement adding or removing one transaction item (NEW/OLD) in the rollup"""
+    return f'''
+        INSERT INTO daily_sales_rollup (sale_date, service_id, staff_id, payment_method, quantity, revenue)
+        SELECT substr(t.transaction_date, 1, 10), {row}.service_id, COALESCE({row}.doctor_id, ''),
+               t.payment_method, {sign} * {row}.quantity,
+               {sign} * ({row}.quantity * {row}.price - COALESCE({row}.discount, 0))
+        FROM transactions t
+        WHERE t.id = {row}.transaction_id AND t.status = 'completed'{_ROLLUP_UPSERT}'''
+
+
+SALES_ROLLUP_TRIGGERS_SQL = f'''
+    -- Replaced by trg_transactions_rollup_update
+    DROP TRIGGER IF EXISTS trg_transactions_rollup_status;
+
+    DROP TRIGGER IF EXISTS trg_transactions_rollup_insert;
+    CREATE TRIGGER trg_transactions_rollup_insert
+    AFTER INSERT ON transactions
+    BEGIN{_transaction_totals('NEW', 1)}{_transaction_items('NEW', 1)}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_transactions_rollup_update;
+    CREATE TRIGGER trg_transactions_rollup_update
+    AFTER UPDATE OF transaction_date, payment_method, status, total_amount,
+                    discount_amount, tax_amount ON transactions
+    BEGIN{_transaction_totals('OLD', -1)}{_transaction_items('OLD', -1)}{_transaction_totals('NEW', 1)}{_transaction_items('NEW', 1)}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_transactions_rollup_delete;
+    CREATE TRIGGER trg_transactions_rollup_delete
+    AFTER DELETE ON transactions
+    BEGIN{_transaction_totals('OLD', -1)}{_transaction_items('OLD', -1)}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_transaction_items_rollup_insert;
+    CREATE TRIGGER trg_transaction_items_rollup_insert
+    AFTER INSERT ON transaction_items
+    BEGIN{_item('NEW', 1)}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_transaction_items_rollup_update;
+    CREATE TRIGGER trg_transaction_items_rollup_update
+    AFTER UPDATE OF transaction_id, service_id, doctor_id, quantity, price, discount
+    ON transaction_items
+    BEGIN{_item('OLD', -1)}{_item('NEW', 1)}
+    END;
+
+    DROP TRIGGER IF EXISTS trg_transaction_items_rollup_delete;
+    CREATE TRIGGER trg_transaction_items_rollup_delete
+    AFTER DELETE ON transaction_items
+    BEGIN{_item('OLD', -1)}
+    END;
+'''
+
+
+
+# A counter bumped by every write to the service/staff catalog, so
+# CatalogCache can tell cheaply whether its in-memory copy is still current,
+# whichever connection (or program) made the change
+CATALOG_VERSION_SQL = '''
+    CREATE TABLE IF NOT EXISTS catalog_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    );
+
+    INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+''' + ''.join(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_catalog_{event.lower()}
+    AFTER {event} ON {table}
+    BEGIN
+        UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    END;
+''' for table in ('services', 'staff', 'staff_services') for event in ('INSERT', 'UPDATE', 'DELETE'))
+
+def _column_exists(conn, table, column):
+    """Check whether a table already has the given column"""
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info({table})'))
+
+
+def install_last_visit_tracking(conn):
+    """Add the patients.last_visit_at column, its index and the triggers that maintain it"""
+    if not _column_exists(conn, 'patients', 'last_visit_at'):
+        conn.execute('ALTER TABLE patients ADD COLUMN last_visit_at TIMESTAMP')
+    execute_script(conn, LAST_VISIT_TRACKING_SQL)
+
+
+def rebuild_last_visits(conn):
+    """
+    Recompute patients.last_visit_at from doctor_notes and patient_photos
+    Returns:
+        int: Number of patient rows updated
+    """
+    install_last_visit_tracking(conn)
+    cursor = conn.execute('''
+        UPDATE patients
+        SET last_visit_at = (
+            SELECT MAX(visit_date) FROM (
+                SELECT created_at as visit_date FROM doctor_notes WHERE patient_id = patients.id
+                UNION ALL
+                SELECT created_at as visit_date FROM patient_photos WHERE patient_id = patients.id
+            )
+        )
+    ''')
+    return cursor.rowcount
+
+
+def patient_search_index_exists(conn):
+    """Check whether the patients_fts index has been created"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'"
+    ).fetchone() is not None
+
+
+def install_patient_search_index(conn):
+    """
+    Create the patients_fts trigram index and its sync triggers
+    Returns:
+        bool: False if this SQLite build has no FTS5 trigram tokenizer
+    """
+    # A savepoint, so a build without trigram support leaves the caller's
+    # transaction as it was
+    conn.execute('SAVEPOINT patient_search_index')
+    try:
+        existed = patient_search_index_exists(conn)
+        execute_script(conn, PATIENT_SEARCH_INDEX_SQL)
+        if not existed:
+            # Index any patients that were already in the table
+            conn.execute("INSERT INTO patients_fts (patients_fts) VALUES ('rebuild')")
+        return True
+    except sqlite3.OperationalError as e:
+        conn.execute('ROLLBACK TO patient_search_index')
+        logger.warning(f"Full-text patient search unavailable, falling back to LIKE: {e}")
+        return False
+    finally:
+        conn.execute('RELEASE patient_search_index')
+
+
+def rebuild_patient_search_index(conn):
+    """Repopulate patients_fts from the patients table (e.g. after a VACUUM)"""
+    if not install_patient_search_index(conn):
+        return False
+    conn.execute("INSERT INTO patients_fts (patients_fts) VALUES ('rebuild')")
+    return True
+
+
+def install_phone_index(conn):
+    """Add the normalized phone columns and their indexes, backfilling existing rows"""
+    for column in ('phone_normalized', 'phone_reversed'):
+        if not _column_exists(conn, 'patients', column):
+            conn.execute(f'ALTER TABLE patients ADD COLUMN {column} TEXT')
+    execute_script(conn, PHONE_INDEX_SQL)
+    return rebuild_phone_index(conn, only_missing=True)
+
+
+def rebuild_phone_index(conn, only_missing=False):
+    """
+    Recompute phone_normalized/phone_reversed from patients.phone
+    Args:
+        only_missing (bool): Only fill rows that have not been normalized yet
+    Returns:
+        int: Number of patient rows updated
+    """
+    query = 'SELECT id, phone FROM patients'
+    if only_missing:
+        query += " WHERE phone_normalized IS NULL AND phone IS NOT NULL AND phone != ''"
+
+    updates = []
+    for patient_id, phone in conn.execute(query).fetchall():
+        normalized = normalize_phone(phone)
+        updates.append((normalized, reversed_phone(normalized), patient_id))
+
+    if updates:
+        conn.executemany(
+            'UPDATE patients SET phone_normalized = ?, phone_reversed = ? WHERE id = ?',
+            updates
+        )
+    return len(updates)
+
+
+
+def install_catalog_version(conn):
+    """Create the catalog_version counter and the triggers that bump it"""
+    execute_script(conn, CATALOG_VERSION_SQL)
+
+def install_sales_rollup(conn):
+    """Create the daily sales rollup tables and triggers, backfilling them from history"""
+    execute_script(conn, SALES_ROLLUP_SQL)
+    return rebuild_sales_rollup(conn)
+
+
+def upgrade_sales_rollup_triggers(conn):
+    """
+    Replace the rollup triggers with SALES_ROLLUP_TRIGGERS_SQL and rebuild the rollup
+    Returns:
+        int: Number of days covered
+    """
+    execute_script(conn, SALES_ROLLUP_TRIGGERS_SQL)
+    return rebuild_sales_rollup(conn)
+
+
+def rebuild_sales_rollup(conn):
+    """
+    Recompute daily_sales_totals and daily_sales_rollup from all transactions
+    Returns:
+        int: Number of days covered
+    """
+    conn.execute('DELETE FROM daily_sales_totals')
+    conn.execute('DELETE FROM daily_sales_rollup')
+    conn.execute('''
+        INSERT INTO daily_sales_totals (sale_date, payment_method, transactions, revenue, discounts, tax)
+        SELECT substr(transaction_date, 1, 10), payment_method, COUNT(*), SUM(total_amount),
+               SUM(COALESCE(discount_amount, 0)), SUM(COALESCE(tax_amount, 0))
+        FROM transactions
+        WHERE status = 'completed'
+        GROUP BY 1, 2
+    ''')
+    conn.execute('''
+        INSERT INTO daily_sales_rollup (sale_date, service_id, staff_id, payment_method, quantity, revenue)
+        SELECT substr(t.transaction_date, 1, 10), ti.service_id, COALESCE(ti.doctor_id, ''),
+               t.payment_method, SUM(ti.quantity),
+               SUM(ti.quantity * ti.price - COALESCE(ti.discount, 0))
+        FROM transactions t
+        JOIN transaction_items ti ON ti.transaction_id = t.id
+        WHERE t.status = 'completed'
+        GROUP BY 1, 2, 3, 4
+    ''')
+    return conn.execute('SELECT COUNT(DISTINCT sale_date) FROM daily_sales_totals').fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clinic POS database maintenance")
+    parser.add_argument('--db', default=Config.DATABASE_PATH, help="Path to the SQLite database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild-last-visits', help="Recompute patients.last_visit_at")
+    subparsers.add_parser('rebuild-search-index', help="Repopulate the patient full-text index")
+    subparsers.add_parser('rebuild-phone-index', help="Recompute normalized patient phone numbers")
+    subparsers.add_parser('rebuild-sales-rollup', help="Recompute the daily sales rollup tables")
+    subparsers.add_parser('migrate', help="Apply pending schema migrations")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    conn = open_connection(args.db)
+    try:
+        if args.command == 'migrate':
+            # Imported here: the migration steps themselves live in this module
+            from .migrations import get_schema_version, migrate
+            applied = migrate(conn)
+            logger.info("Applied %d migrations, schema is at version %s", applied, get_schema_version(conn))
+            return
+
+        # The helpers leave committing to the caller; one transaction per command
+        conn.execute('BEGIN')
+        with conn:
+            if args.command == 'rebuild-last-visits':
+                updated = rebuild_last_visits(conn)
+                logger.info("Rebuilt last visit dates for %d patients", updated)
+            elif args.command == 'rebuild-search-index':
+                if rebuild_patient_search_index(conn):
+                    logger.info("Rebuilt patient search index")
+            elif args.command == 'rebuild-phone-index':
+                install_phone_index(conn)
+                updated = rebuild_phone_index(conn)
+                logger.info("Normalized phone numbers for %d patients", updated)
+            elif args.command == 'rebuild-sales-rollup':
+                install_sales_rollup(conn)
+                days = upgrade_sales_rollup_triggers(conn)
+                logger.info("Rebuilt daily sales rollup for %d days", days)
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
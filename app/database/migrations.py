@@ -0,0 +1,248 @@
+"""Versioned schema migrations.
+
+Each step is applied once, in order, and recorded in the schema_version
+table. Steps are idempotent (IF NOT EXISTS / column checks), so re-running
+one that was interrupted part way is safe. A database that is already up to
+date is only read, never altered.
+
+To change the schema, append a new step to MIGRATIONS; never edit or
+reorder steps that have already shipped.
+"""
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from .connection import execute_script
+from .maintenance import (
+    install_catalog_version,
+    install_last_visit_tracking,
+    install_patient_search_index,
+    install_phone_index,
+    install_sales_rollup,
+    upgrade_sales_rollup_triggers,
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).parent / 'schema.sql'
+
+
+def _table_columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _column_definition(conn, table, column):
+    """
+    Definition to ALTER TABLE ... ADD COLUMN a column the way the (reference)
+    table declares it, or None when SQLite cannot add it to an existing table
+    """
+    info = next(row for row in conn.execute(f'PRAGMA table_info({table})') if row[1] == column)
+    _, _, column_type, notnull, default, pk = info
+    if pk or (notnull and default is None):
+        return None
+    if default is not None and default.upper() in ('CURRENT_TIME', 'CURRENT_DATE', 'CURRENT_TIMESTAMP'):
+        return None
+
+    definition = column_type
+    if default is not None:
+        definition += f' DEFAULT {default}'
+    if notnull:
+        definition += ' NOT NULL'
+    for fk in conn.execute(f'PRAGMA foreign_key_list({table})'):
+        if fk[3] == column:
+            definition += f' REFERENCES {fk[2]}({fk[4]})'
+    return definition
+
+
+def _reconcile_tables(conn, schema_sql):
+    """
+    Bring pre-existing tables in line with the columns schema.sql expects
+    Columns that are only missing and can be added (nullable or with a
+    constant default) are added in place, keeping the rows. Tables that
+    cannot be reconciled that way are renamed to <table>_legacy so the base
+    schema can be created alongside them.
+    Returns:
+        list: Names of the tables that were renamed
+    """
+    expected = sqlite3.connect(':memory:')
+    renamed = []
+    try:
+        expected.executescript(schema_sql)
+        tables = [row[0] for row in expected.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )]
+
+        for table in tables:
+            existing = _table_columns(conn, table)
+            missing = _table_columns(expected, table) - existing
+            if not existing or not missing:
+                continue
+
+            definitions = {column: _column_definition(expected, table, column) for column in missing}
+            if all(definitions.values()):
+                for column, definition in definitions.items():
+                    logger.info(f"Adding column {table}.{column}")
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+                continue
+
+            # Keep foreign keys in other tables pointing at the original name
+            rows = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            logger.warning(
+                f"Renaming incompatible table {table} ({rows} rows) to {table}_legacy; "
+                f"cannot add columns {sorted(c for c, d in definitions.items() if d is None)}"
+            )
+            conn.execute('PRAGMA legacy_alter_table = ON')
+            conn.execute(f'ALTER TABLE {table} RENAME TO {table}_legacy')
+            conn.execute('PRAGMA legacy_alter_table = OFF')
+            renamed.append(table)
+    finally:
+        expected.close()
+    return renamed
+
+
+def _copy_legacy_rows(conn, table):
+    """
+    Copy the rows of <table>_legacy into the new table, over the columns they
+    share. Rows the new constraints reject stay behind in the legacy table.
+    """
+    total = conn.execute(f'SELECT COUNT(*) FROM {table}_legacy').fetchone()[0]
+    columns = ', '.join(sorted(_table_columns(conn, table) & _table_columns(conn, f'{table}_legacy')))
+    try:
+        cursor = conn.execute(
+            f'INSERT OR IGNORE INTO {table} ({columns}) SELECT {columns} FROM {table}_legacy'
+        )
+        logger.warning(
+            f"Copied {cursor.rowcount} of {total} rows from {table}_legacy into {table}; "
+            f"the rest remain in {table}_legacy"
+        )
+    except sqlite3.DatabaseError as e:
+        logger.error(f"Rows of {table} left in {table}_legacy, copy failed: {e}")
+
+
+def _add_column(conn, table, column, definition):
+    if column not in _table_columns(conn, table):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _add_checkout_doctor_columns(conn):
+    """Record which doctor performs each sold service and appointment"""
+    _add_column(conn, 'transaction_items', 'doctor_id', 'TEXT REFERENCES staff(id)')
+    _add_column(conn, 'appointments', 'doctor_id', 'TEXT REFERENCES staff(id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transaction_items_transaction ON transaction_items(transaction_id)')
+
+
+def _add_patient_list_index(conn):
+    """Index backing keyset pagination of the patient list on (name, id)"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_patients_name_id ON patients(name, id)')
+
+
+def _add_catalog_keyset_indexes(conn):
+    """Indexes backing keyset pagination of staff and services"""
+    execute_script(conn, '''
+        CREATE INDEX IF NOT EXISTS idx_staff_name_id ON staff(name, id);
+        CREATE INDEX IF NOT EXISTS idx_services_name_id ON services(name, id);
+        CREATE INDEX IF NOT EXISTS idx_services_category_name_id ON services(category, name, id);
+    ''')
+
+
+def _add_transaction_date_index(conn):
+    """
+    Index for sales reports over a date range. Every transactions column
+    the reports aggregate is included, so they are answered from the index alone.
+    """
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(
+            transaction_date, status, payment_method, total_amount, discount_amount, tax_amount, id
+        )
+    ''')
+
+
+def _apply_base_schema(conn):
+    """Create the tables and indexes defined in schema.sql"""
+    with open(SCHEMA_PATH, 'r') as f:
+        schema_sql = f.read()
+    renamed = _reconcile_tables(conn, schema_sql)
+    execute_script(conn, schema_sql)
+    for table in renamed:
+        _copy_legacy_rows(conn, table)
+
+
+# (version, description, step); step is called with an open connection
+MIGRATIONS = [
+    (1, "Base schema from schema.sql", _apply_base_schema),
+    (2, "Track patients.last_visit_at with triggers", install_last_visit_tracking),
+    (3, "Trigram full-text index on patients", install_patient_search_index),
+    (4, "Normalized phone number columns", install_phone_index),
+    (5, "Doctor on transaction items and appointments", _add_checkout_doctor_columns),
+    (6, "Patient list keyset index", _add_patient_list_index),
+    (7, "Staff and service keyset indexes", _add_catalog_keyset_indexes),
+    (8, "Transaction date index for reports", _add_transaction_date_index),
+    (9, "Daily sales rollup tables", install_sales_rollup),
+    (10, "Sales rollup triggers for updates and deletes", upgrade_sales_rollup_triggers),
+    (11, "Catalog change counter", install_catalog_version),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """
+    Get the version of the newest migration applied to the database
+    Returns:
+        int: 0 for a database that has never been migrated
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, target=None):
+    """
+    Bring the database schema up to date
+    Args:
+        conn: Open sqlite3 connection
+        target (int): Stop after this version (defaults to the latest)
+    Returns:
+        int: Number of migrations applied
+    """
+    target = LATEST_VERSION if target is None else target
+    current = get_schema_version(conn)
+    if current >= target:
+        return 0
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    ''')
+
+    applied = 0
+    for version, description, step in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+
+        logger.info("Applying schema migration %d: %s", version, description)
+        try:
+            # Each step and its schema_version row commit together, DDL included
+            if not conn.in_transaction:
+                conn.execute('BEGIN')
+            step(conn)
+            conn.execute(
+                'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                (version, description, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Schema migration {version} failed: {e}")
+            conn.rollback()
+            raise
+        applied += 1
+
+    return applied
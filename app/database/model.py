@@ -1,25 +1,38 @@
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 
+# Models are frozen; use dataclasses.replace() to change a field. from_row
+# builds one from a sqlite3.Row by column name, converting money columns
+# (stored as REAL) to Decimal.
 
-@dataclass
-class Patient:
+
+def _money(value):
+    return Decimal(str(value)) if value is not None else Decimal('0')
+
+
+class PatientRow(NamedTuple):
+    """
+    A patient, as returned by every DatabaseManager patient query; fields
+    follow PATIENT_COLUMNS. New patients are passed to add_patient as a dict.
+    """
     id: str
     name: str
     phone: str
-    email: Optional[str]
-    address: Optional[str]
-    created_at: datetime
-    medical_history: str = ""
-    notes: str = ""
-    birth_date: Optional[datetime] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    birth_date: Optional[str] = None
     gender: Optional[str] = None
     emergency_contact: Optional[str] = None
+    medical_history: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    last_visit: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Service:
     id: str
     name: str
@@ -28,11 +41,19 @@ class Service:
     category: str
     duration: int  # in minutes
     active: bool = True
-    created_at: datetime = datetime.now()
-    modified_at: datetime = datetime.now()
+    created_at: datetime = field(default_factory=datetime.now)
+    modified_at: datetime = field(default_factory=datetime.now)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row['id'], row['name'], _money(row['price']), row['description'],
+            row['category'], row['duration'], bool(row['active']),
+            row['created_at'], row['modified_at']
+        )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Transaction:
     id: str
     patient_id: str
@@ -46,8 +67,17 @@ class Transaction:
     tax_amount: Decimal = Decimal('0')
     created_by: str = ""
 
+    @classmethod
+    def from_row(cls, row, items=()):
+        return cls(
+            row['id'], row['patient_id'], _money(row['total_amount']),
+            row['payment_method'], row['transaction_date'], row['status'],
+            list(items), row['notes'] or "", _money(row['discount_amount']),
+            _money(row['tax_amount']), row['created_by'] or ""
+        )
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class TransactionItem:
     id: str
     transaction_id: str
@@ -56,9 +86,18 @@ class TransactionItem:
     price: Decimal
     discount: Decimal = Decimal('0')
     notes: str = ""
+    doctor_id: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row['id'], row['transaction_id'], row['service_id'], row['quantity'],
+            _money(row['price']), _money(row['discount']), row['notes'] or "",
+            row['doctor_id']
+        )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Appointment:
     id: str
     patient_id: str
@@ -67,11 +106,20 @@ class Appointment:
     end_time: datetime
     status: str  # scheduled, completed, cancelled, no-show
     notes: str = ""
-    created_at: datetime = datetime.now()
-    modified_at: datetime = datetime.now()
+    created_at: datetime = field(default_factory=datetime.now)
+    modified_at: datetime = field(default_factory=datetime.now)
+    doctor_id: Optional[str] = None
 
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row['id'], row['patient_id'], row['service_id'], row['start_time'],
+            row['end_time'], row['status'], row['notes'] or "",
+            row['created_at'], row['modified_at'], row['doctor_id']
+        )
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Staff:
     id: str
     name: str
@@ -79,5 +127,12 @@ class Staff:
     phone: str
     role: str  # admin, doctor, therapist, receptionist
     active: bool = True
-    created_at: datetime = datetime.now()
-    modified_at: datetime = datetime.now()
\ No newline at end of file
+    created_at: datetime = field(default_factory=datetime.now)
+    modified_at: datetime = field(default_factory=datetime.now)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row['id'], row['name'], row['email'], row['phone'], row['role'],
+            bool(row['active']), row['created_at'], row['modified_at']
+        )
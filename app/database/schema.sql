@@ -9,7 +9,28 @@ CREATE TABLE IF NOT EXISTS patients (
     notes TEXT,
     birth_date TIMESTAMP,
     gender TEXT,
-    emergency_contact TEXT
+    emergency_contact TEXT,
+    updated_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS doctor_notes (
+    id TEXT PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    medical_history TEXT,
+    progress_notes TEXT,
+    recommendations TEXT,
+    next_steps TEXT,
+    created_at TIMESTAMP,
+    FOREIGN KEY (patient_id) REFERENCES patients(id)
+);
+
+CREATE TABLE IF NOT EXISTS patient_photos (
+    id TEXT PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    photo_path TEXT NOT NULL,
+    photo_type TEXT,  -- before, after, progress
+    created_at TIMESTAMP,
+    FOREIGN KEY (patient_id) REFERENCES patients(id)
 );
 
 CREATE TABLE IF NOT EXISTS services (
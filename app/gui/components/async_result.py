@@ -0,0 +1,40 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_MS = 20
+
+
+def deliver(widget, future, on_result, on_error=None, poll_ms=POLL_INTERVAL_MS):
+    """
+    Hand a future's outcome to callbacks on the Tk main thread.
+
+    Tk widgets may only be touched from the main thread, so instead of using
+    future callbacks (which run on the worker) this polls the future with
+    widget.after() and calls on_result(result) or on_error(exception) once
+    it is done. Cancelled futures are ignored.
+
+    Args:
+        widget: Any Tk widget, used for after() scheduling
+        future: concurrent.futures.Future, e.g. from DatabaseManager.submit
+        on_result: Called as on_result(result) on the UI thread
+        on_error: Called as on_error(exception) on the UI thread
+        poll_ms (int): Polling interval while the future is running
+    """
+    def poll():
+        if not future.done():
+            widget.after(poll_ms, poll)
+            return
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Background task failed: {error}", exc_info=error)
+            if on_error:
+                on_error(error)
+            return
+
+        on_result(future.result())
+
+    poll()
@@ -0,0 +1,135 @@
+from dataclasses import replace
+from decimal import Decimal
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Cart:
+    """
+    POS cart: ordered TransactionItem lines keyed by a stable line id.
+
+    Every change notifies listeners with (event, line_id, item), where event
+    is 'add', 'update', 'remove' or 'clear', so views can apply just that
+    change. The cart total is kept as a running sum.
+    """
+
+    def __init__(self):
+        self._lines = {}
+        self._ids = itertools.count(1)
+        self._listeners = []
+        self.total = Decimal('0')
+
+    def subscribe(self, listener):
+        """Register listener(event, line_id, item) for cart changes"""
+        self._listeners.append(listener)
+
+    def _notify(self, event, line_id=None, item=None):
+        for listener in self._listeners:
+            listener(event, line_id, item)
+
+    @staticmethod
+    def line_total(item):
+        """Price times quantity, less the line's discount"""
+        return Decimal(item.price) * item.quantity - Decimal(item.discount or 0)
+
+    def add(self, item):
+        """
+        Append a line to the cart
+        Returns:
+            str: The new line's id
+        """
+        line_id = f"line-{next(self._ids)}"
+        self._lines[line_id] = item
+        self.total += self.line_total(item)
+        self._notify('add', line_id, item)
+        return line_id
+
+    def update(self, line_id, **changes):
+        """Change fields (e.g. quantity) of an existing line"""
+        old = self._lines[line_id]
+        item = replace(old, **changes)
+        self._lines[line_id] = item
+        self.total += self.line_total(item) - self.line_total(old)
+        self._notify('update', line_id, item)
+        return item
+
+    def remove(self, line_id):
+        """Remove a line; unknown ids are ignored"""
+        item = self._lines.pop(line_id, None)
+        if item is None:
+            return
+        self.total -= self.line_total(item)
+        self._notify('remove', line_id, item)
+
+    def clear(self):
+        """Remove every line"""
+        self._lines.clear()
+        self.total = Decimal('0')
+        self._notify('clear')
+
+    def get(self, line_id):
+        return self._lines.get(line_id)
+
+    def lines(self):
+        """(line_id, item) pairs in the order they were added"""
+        return list(self._lines.items())
+
+    def __iter__(self):
+        return iter(list(self._lines.values()))
+
+    def __len__(self):
+        return len(self._lines)
+
+
+class CartView:
+    """
+    Keep a ttk.Treeview in step with a Cart.
+
+    Tree rows use the cart line ids as their iids, so each cart event
+    inserts, updates or deletes exactly one row instead of rebuilding the
+    whole list.
+    """
+
+    def __init__(self, cart, tree, format_line, on_total=None):
+        """
+        Args:
+            cart (Cart): Cart to display
+            tree: ttk.Treeview showing one row per cart line
+            format_line: Called as format_line(item) and returns the row values
+            on_total: Called as on_total(total) whenever the cart total changes
+        """
+        self.cart = cart
+        self.tree = tree
+        self.format_line = format_line
+        self.on_total = on_total
+        cart.subscribe(self.apply)
+
+        # Show anything already in the cart
+        for line_id, item in cart.lines():
+            self.tree.insert('', 'end', iid=line_id, values=self.format_line(item))
+        self._update_total()
+
+    def apply(self, event, line_id, item):
+        """Apply one cart change to the tree"""
+        if event == 'add':
+            self.tree.insert('', 'end', iid=line_id, values=self.format_line(item))
+        elif event == 'update':
+            self.tree.item(line_id, values=self.format_line(item))
+        elif event == 'remove':
+            if self.tree.exists(line_id):
+                self.tree.delete(line_id)
+        elif event == 'clear':
+            self.tree.delete(*self.tree.get_children())
+        self._update_total()
+
+    def refresh(self):
+        """Re-format every row in place, e.g. after a language change"""
+        for line_id, item in self.cart.lines():
+            self.tree.item(line_id, values=self.format_line(item))
+        self._update_total()
+
+    def _update_total(self):
+        if self.on_total:
+            self.on_total(self.cart.total)
@@ -0,0 +1,156 @@
+import logging
+
+from app.gui.components.async_result import deliver
+
+logger = logging.getLogger(__name__)
+
+
+class PagedTreeview:
+    """
+    Show an arbitrarily large, sorted table in a ttk.Treeview a window at a time.
+
+    Only up to max_rows rows are ever in the tree. Rows are fetched a page
+    at a time with keyset pagination: scrolling near the bottom loads the
+    page after the last row and drops rows from the top, scrolling near the
+    top loads the page before the first row and drops rows from the bottom.
+    Memory use and redraw time therefore depend on the window size, not on
+    the size of the table.
+    """
+
+    # Fraction of the scroll range near either end that triggers a prefetch
+    PREFETCH_THRESHOLD = 0.2
+
+    def __init__(self, tree, scrollbar, fetch_page, row_values, row_key, row_id,
+                 submit, on_error=None, page_size=100, max_rows=300):
+        """
+        Args:
+            tree: ttk.Treeview to fill
+            scrollbar: Vertical ttk.Scrollbar attached to the tree
+            fetch_page: Called as fetch_page(after=cursor, before=cursor, limit=n)
+                on a worker thread; returns a Page, e.g. DatabaseManager.iter_patients
+            row_values: Called as row_values(row), returns the tree row values
+            row_key: Called as row_key(row), returns the row's cursor token,
+                e.g. DatabaseManager.patient_cursor
+            row_id: Called as row_id(row), returns a unique tree iid
+            submit: Executor-style submit(fn, *args, **kwargs), e.g. DatabaseManager.submit
+            on_error: Called as on_error(exception) if a page fails to load
+            page_size (int): Rows fetched per page
+            max_rows (int): Rows kept in the tree at most
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.row_values = row_values
+        self.row_key = row_key
+        self.row_id = row_id
+        self.submit = submit
+        self.page_size = page_size
+        self.max_rows = max(max_rows, page_size * 2)
+        self.on_error = on_error
+
+        self._keys = {}
+        self._at_start = True
+        self._at_end = False
+        self._loading = False
+        self._generation = 0
+        self._active = False
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def reload(self):
+        """Drop the current window and load the first page"""
+        self._generation += 1
+        self._active = True
+        self._clear()
+        self._at_start = True
+        self._at_end = False
+        self._load(after=None, before=None, on_rows=self._append)
+
+    def suspend(self):
+        """Stop paging, e.g. while the tree shows search results instead"""
+        self._generation += 1
+        self._active = False
+        self._loading = False
+        self._keys.clear()
+
+    def _clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if not self._active or self._loading:
+            return
+
+        children = self.tree.get_children()
+        if not children:
+            return
+        if float(last) >= 1 - self.PREFETCH_THRESHOLD and not self._at_end:
+            self._load(after=self._keys[children[-1]], before=None, on_rows=self._append)
+        elif float(first) <= self.PREFETCH_THRESHOLD and not self._at_start:
+            self._load(after=None, before=self._keys[children[0]], on_rows=self._prepend)
+
+    def _load(self, after, before, on_rows):
+        self._loading = True
+        generation = self._generation
+        future = self.submit(self.fetch_page, after=after, before=before, limit=self.page_size)
+
+        def done(page):
+            if generation != self._generation:
+                return
+            self._loading = False
+            on_rows(page)
+            # The view may still be near an edge (e.g. after dragging the scrollbar)
+            self._on_scroll(*self.tree.yview())
+
+        def failed(error):
+            if generation != self._generation:
+                return
+            self._loading = False
+            if self.on_error:
+                self.on_error(error)
+
+        deliver(self.tree, future, done, failed)
+
+    def _insert(self, row, index):
+        iid = self.row_id(row)
+        if self.tree.exists(iid):
+            return False
+        self.tree.insert('', index, iid=iid, values=self.row_values(row))
+        self._keys[iid] = self.row_key(row)
+        return True
+
+    def _append(self, page):
+        if page.next_cursor is None:
+            self._at_end = True
+        for row in page.rows:
+            self._insert(row, 'end')
+
+        # Drop rows scrolled out at the top and keep the view where it was
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess > 0:
+            self._delete(children[:excess])
+            self._at_start = False
+            self.tree.yview_scroll(-excess, 'units')
+
+    def _prepend(self, page):
+        if page.prev_cursor is None:
+            self._at_start = True
+        inserted = 0
+        for row in page.rows:
+            if self._insert(row, inserted):
+                inserted += 1
+
+        # Drop rows at the bottom and keep the view where it was
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess > 0:
+            self._delete(children[-excess:])
+            self._at_end = False
+        self.tree.yview_scroll(inserted, 'units')
+
+    def _delete(self, iids):
+        self.tree.delete(*iids)
+        for iid in iids:
+            self._keys.pop(iid, None)
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from app.gui.components.async_result import deliver
+
+logger = logging.getLogger(__name__)
+
+
+class PatientSearchController:
+    """
+    Debounce a search entry and run its query off the Tk main thread.
+
+    Each keystroke restarts a short timer; once typing pauses the query runs
+    on a worker thread and its results are handed back on the UI thread.
+    Results for a query that has since been superseded are dropped.
+    """
+
+    def __init__(self, widget, search_fn, on_results, on_error=None, delay_ms=250, min_length=2,
+                 submit=None):
+        """
+        Args:
+            widget: Any Tk widget, used for after() scheduling
+            search_fn: Called as search_fn(search_term) on the worker thread
+            on_results: Called as on_results(search_term, results) on the UI thread
+            on_error: Called as on_error(exception) on the UI thread
+            delay_ms (int): Quiet period after the last keystroke before searching
+            min_length (int): Shorter search terms are ignored
+            submit: Executor-style submit(fn, *args) returning a Future, e.g.
+                DatabaseManager.submit; defaults to a private worker thread
+        """
+        self.widget = widget
+        self.search_fn = search_fn
+        self.on_results = on_results
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.min_length = min_length
+
+        if submit is None:
+            submit = ThreadPoolExecutor(max_workers=1, thread_name_prefix='patient-search').submit
+        self.submit = submit
+
+        self._after_id = None
+        self._future = None
+
+    def schedule(self, search_term):
+        """Start (or restart) the debounce timer for a new search term"""
+        self.cancel()
+        if len(search_term) < self.min_length:
+            return
+        self._after_id = self.widget.after(self.delay_ms, self._start, search_term)
+
+    def cancel(self):
+        """Drop any pending or in-flight search"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._future is not None:
+            # A query that already started keeps running, but its result
+            # is ignored because it is no longer the current future
+            self._future.cancel()
+            self._future = None
+
+    def _start(self, search_term):
+        self._after_id = None
+        future = self.submit(self.search_fn, search_term)
+        self._future = future
+        deliver(
+            self.widget, future,
+            on_result=lambda results: self._finish(future, search_term, results),
+            on_error=lambda error: self._fail(future, error)
+        )
+
+    def _finish(self, future, search_term, results):
+        if future is not self._future:
+            return
+        self._future = None
+        self.on_results(search_term, results)
+
+    def _fail(self, future, error):
+        if future is not self._future:
+            return
+        self._future = None
+        if self.on_error:
+            self.on_error(error)
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+
+from PIL import ImageTk
+
+from app.gui.components.async_result import deliver
+from app.utils.thumbnails import load_thumbnail
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoImageCache:
+    """
+    LRU of photo thumbnails ready to show in Tk widgets.
+
+    Entries are keyed by (path, mtime, size), so an edited photo is reloaded.
+    On a miss the thumbnail comes from the on-disk cache in
+    app.utils.thumbnails, which only decodes the full-size photo the first
+    time. PhotoImages must be created on the Tk main thread; get() does
+    everything there, request() decodes on a worker thread first.
+    """
+
+    def __init__(self, maxsize=None, submit=None):
+        """
+        Args:
+            maxsize (int): PhotoImages kept at most; defaults to Config.PHOTO_CACHE_SIZE
+            submit: Executor-style submit(fn, *args) returning a Future;
+                defaults to a private worker thread
+        """
+        self.maxsize = Config.PHOTO_CACHE_SIZE if maxsize is None else maxsize
+        # Only an executor created here is shut down by close()
+        self._executor = None
+        if submit is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='thumbnails')
+            submit = self._executor.submit
+        self.submit = submit
+        self._images = OrderedDict()
+
+    @staticmethod
+    def _key(photo_path, size):
+        return (os.path.abspath(photo_path), os.stat(photo_path).st_mtime_ns, size)
+
+    def _lookup(self, key):
+        photo = self._images.get(key)
+        if photo is not None:
+            self._images.move_to_end(key)
+        return photo
+
+    def _store(self, key, image):
+        photo = ImageTk.PhotoImage(image)
+        self._images[key] = photo
+        self._images.move_to_end(key)
+        while len(self._images) > self.maxsize:
+            self._images.popitem(last=False)
+        return photo
+
+    def get(self, photo_path, size):
+        """Get a PhotoImage of the photo fitting a size x size box (UI thread only)"""
+        key = self._key(photo_path, size)
+        photo = self._lookup(key)
+        if photo is None:
+            photo = self._store(key, load_thumbnail(photo_path, size))
+        return photo
+
+    def request(self, widget, photo_path, size, on_photo, on_error=None):
+        """
+        Call on_photo(photo) on the UI thread once the thumbnail is ready
+        Cached thumbnails are delivered immediately; otherwise the image is
+        decoded on a worker thread.
+        Returns:
+            Future or None: The pending load, which can be cancelled
+        """
+        try:
+            key = self._key(photo_path, size)
+        except OSError as e:
+            if on_error:
+                on_error(e)
+            return None
+
+        photo = self._lookup(key)
+        if photo is not None:
+            on_photo(photo)
+            return None
+
+        future = self.submit(load_thumbnail, photo_path, size)
+        deliver(widget, future, lambda image: on_photo(self._store(key, image)), on_error)
+        return future
+
+    def clear(self):
+        self._images.clear()
+
+    def close(self):
+        """Drop the cached images and stop the private worker thread, if any"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.clear()
@@ -0,0 +1,152 @@
+import tkinter as tk
+from tkinter import ttk
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoGallery(ttk.Frame):
+    """
+    Scrollable grid of photo thumbnails that loads lazily.
+
+    The window appears right away with a placeholder per photo. Thumbnails
+    are decoded on the PhotoImageCache's worker threads, visible cells first,
+    and drawn as each one arrives. Cells more than a screen away from the
+    view are released again, so memory is bounded by the viewport rather
+    than by the number of photos.
+    """
+
+    CAPTION_HEIGHT = 24
+    PADDING = 10
+
+    def __init__(self, parent, photo_paths, photo_cache, size=200, columns=3, caption=None):
+        """
+        Args:
+            parent: Tk container
+            photo_paths (list): Photos in display order
+            photo_cache (PhotoImageCache): Source of the thumbnails
+            size (int): Thumbnail bounding box in pixels
+            columns (int): Photos per row
+            caption: Called as caption(photo_path), returns the text under a photo
+        """
+        super().__init__(parent)
+        self.photo_paths = list(photo_paths)
+        self.photo_cache = photo_cache
+        self.size = size
+        self.columns = columns
+        self.caption = caption
+
+        self.cell_width = size + self.PADDING
+        self.cell_height = size + self.CAPTION_HEIGHT + self.PADDING
+
+        self.canvas = tk.Canvas(self, width=self.cell_width * columns, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._image_items = []
+        self._photos = {}    # cell index -> PhotoImage currently drawn
+        self._pending = {}   # cell index -> Future of a thumbnail being loaded
+        self._update_id = None
+        self._closed = False
+
+        self._draw_placeholders()
+        self.canvas.bind("<Configure>", lambda e: self._schedule_update())
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _cell_origin(self, index):
+        row, col = divmod(index, self.columns)
+        return col * self.cell_width + self.PADDING // 2, row * self.cell_height + self.PADDING // 2
+
+    def _draw_placeholders(self):
+        for index, photo_path in enumerate(self.photo_paths):
+            x, y = self._cell_origin(index)
+            self.canvas.create_rectangle(x, y, x + self.size, y + self.size, outline="#cccccc")
+            self.canvas.create_text(
+                x + self.size // 2, y + self.size // 2, text="Loading...", fill="#999999"
+            )
+            self._image_items.append(
+                self.canvas.create_image(x + self.size // 2, y + self.size // 2, anchor="center")
+            )
+            if self.caption:
+                self.canvas.create_text(
+                    x + self.size // 2, y + self.size + self.CAPTION_HEIGHT // 2,
+                    text=self.caption(photo_path)
+                )
+
+        rows = -(-len(self.photo_paths) // self.columns)
+        self.canvas.configure(scrollregion=(0, 0, self.cell_width * self.columns, rows * self.cell_height))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_update()
+
+    def _schedule_update(self):
+        # Coalesce the burst of scroll events from a drag into one update
+        if self._update_id is None:
+            self._update_id = self.after_idle(self._update_visible)
+
+    def _row_range(self, top, bottom):
+        first = max(int(top // self.cell_height), 0)
+        last = int(bottom // self.cell_height)
+        return first * self.columns, min((last + 1) * self.columns, len(self.photo_paths))
+
+    def _update_visible(self):
+        self._update_id = None
+        if self._closed:
+            return
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.cell_height)
+
+        visible = range(*self._row_range(top, top + height))
+        # Keep a screen above and below loaded so short scrolls don't flicker
+        keep = range(*self._row_range(top - height, top + 2 * height))
+
+        for index in list(self._photos):
+            if index not in keep:
+                self.canvas.itemconfigure(self._image_items[index], image="")
+                del self._photos[index]
+        for index in list(self._pending):
+            if index not in keep:
+                self._pending.pop(index).cancel()
+
+        # Visible cells first, then the ones just outside the view
+        for index in [*visible, *(i for i in keep if i not in visible)]:
+            if index not in self._photos and index not in self._pending:
+                self._load(index)
+
+    def _load(self, index):
+        loading = {}
+
+        def show(photo):
+            if self._closed:
+                return
+            if 'future' in loading and self._pending.get(index) is not loading['future']:
+                # Released (scrolled away) while it was decoding
+                return
+            self._pending.pop(index, None)
+            self._photos[index] = photo
+            self.canvas.itemconfigure(self._image_items[index], image=photo)
+
+        def failed(error):
+            if 'future' in loading and self._pending.get(index) is not loading['future']:
+                # Released, and possibly requested again, while it was decoding
+                return
+            self._pending.pop(index, None)
+            logger.error(f"Error loading photo {self.photo_paths[index]}: {error}")
+
+        future = self.photo_cache.request(self, self.photo_paths[index], self.size, show, failed)
+        # Cached thumbnails are shown before request() returns
+        if future is not None and index not in self._photos:
+            loading['future'] = future
+            self._pending[index] = future
+
+    def _on_destroy(self, event):
+        if event.widget is not self:
+            return
+        self._closed = True
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._photos.clear()
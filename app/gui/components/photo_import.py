@@ -0,0 +1,64 @@
+import tkinter as tk
+from tkinter import ttk
+import logging
+
+from app.gui.components.async_result import deliver
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoImportProgress(tk.Toplevel):
+    """
+    Progress window for a PhotoBatch.
+
+    Polls the batch with after() while the worker processes run, then
+    records the saved photos (one transaction, on a database worker thread)
+    and reports back.
+    """
+
+    def __init__(self, parent, batch, title, on_done, poll_ms=100):
+        """
+        Args:
+            parent: Tk widget the window belongs to
+            batch (PhotoBatch): Batch from PhotoIngestService.start
+            title (str): Window title
+            on_done: Called as on_done(saved_paths, failures) on the UI thread,
+                or on_done(None, error) if recording the batch failed
+            poll_ms (int): Progress polling interval
+        """
+        super().__init__(parent)
+        self.batch = batch
+        self.on_done = on_done
+        self.poll_ms = poll_ms
+
+        self.title(title)
+        self.transient(parent)
+        self.resizable(False, False)
+
+        self.status = ttk.Label(self, text=f"0 / {len(batch)}")
+        self.status.pack(padx=20, pady=(15, 5))
+        self.progress = ttk.Progressbar(self, length=300, maximum=len(batch), mode='determinate')
+        self.progress.pack(padx=20, pady=(0, 15))
+
+        self.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        completed = self.batch.completed()
+        self.progress.configure(value=completed)
+        self.status.configure(text=f"{completed} / {len(self.batch)}")
+        if not self.batch.done():
+            self.after(self.poll_ms, self._poll)
+            return
+
+        self.status.configure(text="Saving...")
+        deliver(self, self.batch.db.submit(self.batch.record), self._recorded, self._record_failed)
+
+    def _recorded(self, result):
+        saved, failed = result
+        self.destroy()
+        self.on_done(saved, failed)
+
+    def _record_failed(self, error):
+        # deliver() has already logged it
+        self.destroy()
+        self.on_done(None, error)
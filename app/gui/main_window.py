@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 import os
+import uuid
 from datetime import datetime
 from decimal import Decimal
 from datetime import datetime, timedelta
@@ -9,9 +10,21 @@ import logging
 
 from app.gui.theme_config import ThemeConfig
 from app.utils.language_manager import LanguageManager
-from app.utils.invoice_generator import InvoiceGenerator
+from app.utils.invoice_generator import InvoiceGenerator, InvoiceRenderer
+from app.utils.receipt_renderer import ReceiptRenderer
 from app.database.db_manager import DatabaseManager
-from app.database.model import Patient, Service, Transaction, TransactionItem
+from app.database.model import Service, TransactionItem
+from app.services.checkout import CheckoutService
+from app.services.reports import ReportService
+from app.gui.components.async_result import deliver
+from app.gui.components.cart import Cart, CartView
+from app.gui.components.paged_treeview import PagedTreeview
+from app.gui.components.patient_search import PatientSearchController
+from app.gui.components.photo_cache import PhotoImageCache
+from app.gui.components.photo_import import PhotoImportProgress
+from app.services.photo_ingest import PhotoIngestService
+from app.utils.thumbnails import generate_thumbnails
+from app.utils.logging import configure_logging
 logger = logging.getLogger(__name__)
 
 
@@ -24,12 +37,17 @@ class BeautyClinicPOS:
             logger.debug("Initializing database connection...")
             self.db = DatabaseManager()
             self.lang = LanguageManager(self.db)
+            self.checkout_service = CheckoutService(self.db)
+            self.report_service = ReportService(self.db)
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             messagebox.showerror("Database Error",
                                  "Failed to connect to database. The application will run with limited functionality.")
             self.db = None
 
+        self.photo_cache = PhotoImageCache()
+        self.photo_ingest = PhotoIngestService(self.db)
+
         # Create main window
         logger.debug("Creating root window...")
         self.root = tk.Tk()
@@ -37,6 +55,8 @@ class BeautyClinicPOS:
         try:
             # Initialize other components
             self.invoice_generator = InvoiceGenerator()
+            self.invoice_renderer = InvoiceRenderer(self.db, self.invoice_generator)
+            self.receipt_renderer = ReceiptRenderer()
 
             # Setup window appearance
             self.setup_window()
@@ -49,7 +69,8 @@ class BeautyClinicPOS:
 
             # Initialize state variables
             self.current_patient = None
-            self.cart_items = []
+
+            self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
             logger.debug("Successfully initialized BeautyClinicPOS")
         except Exception as e:
@@ -85,18 +106,25 @@ class BeautyClinicPOS:
         self.clear_patient_results()
 
         if len(search_term) < 2:
+            self.patient_search.cancel()
             self.show_search_message("Enter at least 2 characters to search")
             return
 
-        try:
-            patients = self.db.search_patients(search_term)
-            if patients:
-                self.display_patient_results(patients)
-            else:
-                self.show_no_results_found()
-        except Exception as e:
-            logger.error(f"Search error: {e}")
-            self.show_search_message("An error occurred during search", "error")
+        # Debounced; the query itself runs off the UI thread
+        self.patient_search.schedule(search_term)
+
+    def show_patient_search_results(self, search_term, patients):
+        """Display background search results for the POS patient search"""
+        self.clear_patient_results()
+        if patients:
+            self.display_patient_results(patients)
+        else:
+            self.show_no_results_found()
+
+    def on_patient_search_error(self, error):
+        """Report a failed background patient search"""
+        self.clear_patient_results()
+        self.show_search_message("An error occurred during search", "error")
 
     def show_add_patient_form(self):
         """Show the add patient form in a new window"""
@@ -228,8 +256,10 @@ class BeautyClinicPOS:
                 return
 
         try:
-            # Create patient object
+            # Create patient data
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             patient_data = {
+                'id': str(uuid.uuid4()),
                 'name': self.patient_form_vars['name'].get().strip(),
                 'phone': self.patient_form_vars['phone'].get().strip(),
                 'email': self.patient_form_vars['email'].get().strip(),
@@ -239,11 +269,12 @@ class BeautyClinicPOS:
                 'emergency_contact': self.patient_form_vars['emergency_contact'].get().strip(),
                 'medical_history': self.medical_history_text.get('1.0', tk.END).strip(),
                 'notes': self.notes_text.get('1.0', tk.END).strip(),
-                'created_at': datetime.now()
+                'created_at': now,
+                'updated_at': now
             }
 
             # Save to database
-            patient_id = self.db.add_patient(Patient(**patient_data))
+            self.db.add_patient(patient_data)
 
             # Show success message
             messagebox.showinfo(
@@ -609,7 +640,7 @@ class BeautyClinicPOS:
         """Refresh all displays after language change"""
         if hasattr(self, 'current_patient') and self.current_patient:
             self.update_patient_display()
-        self.update_cart_display()
+        self.cart_view.refresh()
         self.refresh_patient_list()
         self.refresh_services_list()
 
@@ -736,13 +767,28 @@ class BeautyClinicPOS:
         self.patient_list_search.pack(side='left', fill='x', expand=True, padx=5)
 
         # Patient list
-        self.patient_list = ttk.Treeview(self.patients_tab,
+        list_frame = ttk.Frame(self.patients_tab)
+        list_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        self.patient_list = ttk.Treeview(list_frame,
                                          columns=('name', 'phone', 'email'),
                                          show='headings')
         self.patient_list.heading('name', text='Name')
         self.patient_list.heading('phone', text='Phone')
         self.patient_list.heading('email', text='Email')
-        self.patient_list.pack(fill='both', expand=True, padx=10, pady=5)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.patient_list.yview)
+        self.patient_list.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        # Pages of patients are fetched by (name, id) as the list scrolls
+        self.patient_pages = PagedTreeview(
+            self.patient_list,
+            scrollbar,
+            fetch_page=self.db.iter_patients,
+            row_values=lambda patient: (patient.name, patient.phone, patient.email),
+            row_key=self.db.patient_cursor,
+            row_id=lambda patient: patient.id,
+            submit=self.db.submit
+        )
 
         # Buttons frame
         buttons_frame = ttk.Frame(self.patients_tab)
@@ -755,14 +801,34 @@ class BeautyClinicPOS:
 
     def setup_services_tab(self):
         # Services list
-        self.services_tree = ttk.Treeview(self.services_tab,
+        list_frame = ttk.Frame(self.services_tab)
+        list_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        self.services_tree = ttk.Treeview(list_frame,
                                           columns=('name', 'price', 'duration', 'category'),
                                           show='headings')
         self.services_tree.heading('name', text='Service Name')
         self.services_tree.heading('price', text='Price')
         self.services_tree.heading('duration', text='Duration')
         self.services_tree.heading('category', text='Category')
-        self.services_tree.pack(fill='both', expand=True, padx=10, pady=5)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.services_tree.yview)
+        self.services_tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        # Pages of services are fetched by (name, id) as the list scrolls
+        self.service_pages = PagedTreeview(
+            self.services_tree,
+            scrollbar,
+            fetch_page=self.db.iter_services,
+            row_values=lambda service: (
+                service.name,
+                f"฿{service.price:,.2f}",
+                f"{service.duration} mins",
+                service.category
+            ),
+            row_key=self.db.service_cursor,
+            row_id=lambda service: service.id,
+            submit=self.db.submit
+        )
 
         # Buttons
         buttons_frame = ttk.Frame(self.services_tab)
@@ -801,51 +867,27 @@ class BeautyClinicPOS:
         ttk.Radiobutton(report_types, text="Custom", variable=self.report_type,
                         value="custom").pack(side='left', padx=5)
 
-        # Date selection
+        # Date selection (used by Custom; YYYY-MM-DD)
         dates_frame = ttk.Frame(self.reports_tab)
         dates_frame.pack(fill='x', padx=10, pady=5)
 
+        today = datetime.now().date().isoformat()
+        ttk.Label(dates_frame, text="From:").pack(side='left', padx=5)
+        self.report_start = ttk.Entry(dates_frame, width=12)
+        self.report_start.insert(0, today)
+        self.report_start.pack(side='left', padx=5)
+        ttk.Label(dates_frame, text="To:").pack(side='left', padx=5)
+        self.report_end = ttk.Entry(dates_frame, width=12)
+        self.report_end.insert(0, today)
+        self.report_end.pack(side='left', padx=5)
+
         ttk.Button(dates_frame, text="Generate Report",
                    command=self.generate_report).pack(side='right', padx=5)
 
-    # Event handlers
-    def on_patient_search(self, *args):
-        search_term = self.patient_search_var.get()
-        if len(search_term) >= 3:
-            patients = self.db.search_patients(search_term)
-            # Update patient search results display
-
-    def process_payment(self):
-        if not self.current_patient or not self.cart_items:
-            messagebox.showerror("Error", "Please select a patient and add services to cart")
-            return
-
-        try:
-            # Create transaction
-            transaction = Transaction(
-                id="",  # Will be generated by DB
-                patient_id=self.current_patient.id,
-                total_amount=self.calculate_total(),
-                payment_method=self.payment_method.get(),
-                transaction_date=datetime.now(),
-                status="completed",
-                items=self.cart_items
-            )
-
-            # Save to database
-            transaction_id = self.db.create_transaction(transaction)
-
-            # Generate invoice
-            self.generate_invoice(transaction_id)
-
-            # Clear cart
-            self.clear_cart()
-
-            messagebox.showinfo("Success", "Payment processed successfully")
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Error processing payment: {str(e)}")
+        self.report_output = tk.Text(self.reports_tab, font=('Courier New', 10), state='disabled')
+        self.report_output.pack(fill='both', expand=True, padx=10, pady=5)
 
+    # Event handlers
     def show_add_patient_dialog(self):
         dialog = tk.Toplevel(self.root)
         dialog.title("Add New Patient")
@@ -875,15 +917,17 @@ class BeautyClinicPOS:
 
         def save_patient():
             try:
-                patient = Patient(
-                    id="",  # Will be generated by DB
-                    name=name_entry.get(),
-                    phone=phone_entry.get(),
-                    email=email_entry.get(),
-                    address=address_entry.get(),
-                    created_at=datetime.now(),
-                    medical_history=medical_history.get("1.0", tk.END).strip()
-                )
+                now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                patient = {
+                    'id': str(uuid.uuid4()),
+                    'name': name_entry.get(),
+                    'phone': phone_entry.get(),
+                    'email': email_entry.get(),
+                    'address': address_entry.get(),
+                    'medical_history': medical_history.get("1.0", tk.END).strip(),
+                    'created_at': now,
+                    'updated_at': now
+                }
 
                 self.db.add_patient(patient)
                 messagebox.showinfo("Success", "Patient added successfully")
@@ -970,28 +1014,69 @@ class BeautyClinicPOS:
             messagebox.showwarning("Warning", "Please select a service to edit")
             return
 
-        service_id = self.services_tree.item(selection[0])['values'][0]
+        # Rows are keyed by service ID
+        service_id = selection[0]
         service = self.db.get_service(service_id)
         # Similar to add_service_dialog but with pre-filled values
 
     def generate_report(self):
+        """Aggregate sales for the selected period in the background and show them"""
         report_type = self.report_type.get()
         try:
+            today = datetime.now().date()
             if report_type == "daily":
-                transactions = self.db.get_daily_transactions(datetime.now())
+                future = self.db.submit(self.report_service.daily_report, today)
             elif report_type == "monthly":
-                transactions = self.db.get_monthly_transactions(datetime.now())
+                future = self.db.submit(self.report_service.monthly_report, today)
             else:
-                # Custom date range logic here
-                pass
-
-            # Generate report using the transactions
-            self.generate_report_pdf(transactions)
-            messagebox.showinfo("Success", "Report generated successfully")
+                start = datetime.strptime(self.report_start.get().strip(), '%Y-%m-%d').date()
+                end = datetime.strptime(self.report_end.get().strip(), '%Y-%m-%d').date()
+                # Long ranges are summarized by month rather than by day
+                period = 'day' if (end - start).days <= 62 else 'month'
+                future = self.db.submit(self.report_service.sales_report, start, end, period)
+
+            deliver(
+                self.root,
+                future,
+                self.display_report,
+                lambda e: messagebox.showerror("Error", f"Error generating report: {str(e)}")
+            )
 
         except Exception as e:
             messagebox.showerror("Error", f"Error generating report: {str(e)}")
 
+    def display_report(self, report):
+        """Show a SalesReport in the reports tab"""
+        summary = report.summary
+        lines = [
+            f"Sales {report.start.isoformat()} to {report.end.isoformat()}",
+            "",
+            f"{'Transactions':<24}{summary.transactions:>16}",
+            f"{'Revenue':<24}{summary.revenue:>16,.2f}",
+            f"{'Discounts':<24}{summary.discounts:>16,.2f}",
+            f"{'Tax':<24}{summary.tax:>16,.2f}",
+            "",
+            "By payment method",
+            *(f"  {row.payment_method or '-':<22}{row.transactions:>8}{row.revenue:>16,.2f}"
+              for row in report.by_payment_method),
+            "",
+            "By service",
+            *(f"  {(row.service_name or row.service_id)[:30]:<30}{row.quantity:>8}{row.revenue:>16,.2f}"
+              for row in report.by_service),
+            "",
+            "By doctor",
+            *(f"  {(row.staff_name or row.staff_id or '-')[:30]:<30}{row.quantity:>8}{row.revenue:>16,.2f}"
+              for row in report.by_staff),
+            "",
+            "By period",
+            *(f"  {row.period:<22}{row.transactions:>8}{row.revenue:>16,.2f}"
+              for row in report.by_period),
+        ]
+        self.report_output.configure(state='normal')
+        self.report_output.delete('1.0', tk.END)
+        self.report_output.insert('1.0', "\n".join(lines))
+        self.report_output.configure(state='disabled')
+
     def add_to_cart(self, service_id):
         service = self.db.get_service(service_id)
         if service:
@@ -1002,30 +1087,10 @@ class BeautyClinicPOS:
                 quantity=1,
                 price=service.price
             )
-            self.cart_items.append(item)
-            self.update_cart_display()
-
-    def update_cart_display(self):
-        self.cart_list.delete(*self.cart_list.get_children())
-        total = Decimal('0')
-
-        for item in self.cart_items:
-            service = self.db.get_service(item.service_id)
-            item_total = item.price * item.quantity
-            total += item_total
-
-            self.cart_list.insert('', 'end', values=(
-                service.name,
-                item.quantity,
-                f"฿{item.price:,.2f}",
-                f"฿{item_total:,.2f}"
-            ))
-
-        self.subtotal_var.set(f"฿{total:,.2f}")
+            self.cart.add(item)
 
     def clear_cart(self):
-        self.cart_items = []
-        self.update_cart_display()
+        self.cart.clear()
 
     def setup_pos_tab(self):
         """Setup enhanced POS tab with multilingual support"""
@@ -1073,6 +1138,14 @@ class BeautyClinicPOS:
         self.patient_info_frame = ttk.Frame(patient_frame)
         self.patient_info_frame.pack(fill='x', padx=5, pady=5)
 
+        self.patient_search = PatientSearchController(
+            self.root,
+            search_fn=self.db.search_patients,
+            on_results=self.show_patient_search_results,
+            on_error=self.on_patient_search_error,
+            submit=self.db.submit
+        )
+
         # Services Section with Categories
         services_frame = ttk.LabelFrame(
             left_frame,
@@ -1167,6 +1240,15 @@ class BeautyClinicPOS:
             textvariable=self.subtotal_var
         ).pack(side='left', padx=5)
 
+        # Cart model; the view applies each add/remove to the tree directly
+        self.cart = Cart()
+        self.cart_view = CartView(
+            self.cart,
+            self.cart_list,
+            format_line=self.format_cart_line,
+            on_total=lambda total: self.subtotal_var.set(f"฿{total:,.2f}")
+        )
+
         # Payment Section
         payment_frame = ttk.LabelFrame(
             right_frame,
@@ -1222,8 +1304,7 @@ class BeautyClinicPOS:
                 quantity=1,
                 price=service.price
             )
-            self.cart_items.append(item)
-            self.update_cart_display()
+            self.cart.add(item)
 
     def select_doctor_dialog(self, service_id):
         """Show dialog to select doctor for service"""
@@ -1271,7 +1352,7 @@ class BeautyClinicPOS:
 
     def process_payment(self):
         """Enhanced payment processing with appointment creation"""
-        if not self.current_patient or not self.cart_items:
+        if not self.current_patient or not len(self.cart):
             messagebox.showerror(
                 "Error",
                 self.lang.get_text("select_patient_and_services")
@@ -1279,29 +1360,15 @@ class BeautyClinicPOS:
             return
 
         try:
-            # Create transaction
-            transaction = Transaction(
-                id="",
+            # Transaction, items and appointments are saved atomically
+            transaction_id = self.checkout_service.checkout(
                 patient_id=self.current_patient.id,
-                total_amount=self.calculate_total(),
-                payment_method=self.payment_method.get(),
-                transaction_date=datetime.now(),
-                status="completed",
-                items=self.cart_items
+                cart=self.cart,
+                payment_method=self.payment_method.get()
             )
 
-            # Save to database
-            transaction_id = self.db.create_transaction(transaction)
-
-            # Create appointments for each service
-            for item in self.cart_items:
-                self.create_appointment(
-                    patient_id=self.current_patient.id,
-                    service_id=item.service_id,
-                    doctor_id=item.doctor_id
-                )
-
-            # Generate invoice
+            # Counter receipt first, then the invoice PDF, both in the background
+            self.save_receipt(transaction_id)
             self.generate_invoice(transaction_id)
 
             # Clear cart
@@ -1319,26 +1386,40 @@ class BeautyClinicPOS:
                 self.lang.get_text("payment_error")
             )
 
+    def save_receipt(self, transaction_id):
+        """Write a transaction's HTML and thermal text receipts without blocking the UI"""
+        def save():
+            invoice = self.db.get_invoice_data([transaction_id])[transaction_id]
+            return self.receipt_renderer.save(invoice)
+
+        deliver(
+            self.root,
+            self.db.submit(save),
+            lambda paths: logger.info("Receipt ready: %s", paths[1]),
+            lambda error: logger.error(f"Error saving receipt for transaction {transaction_id}: {error}")
+        )
+
+    def generate_invoice(self, transaction_id):
+        """Render a transaction's invoice PDF without blocking the UI"""
+        def failed(error):
+            logger.error(f"Error generating invoice for transaction {transaction_id}: {error}")
+            messagebox.showerror(
+                "Error",
+                self.lang.get_text("error_generating_invoice")
+            )
+
+        deliver(
+            self.root,
+            self.invoice_renderer.submit(transaction_id),
+            lambda path: logger.info("Invoice ready: %s", path),
+            failed
+        )
+
     def refresh_patient_list(self):
-        self.patient_list.delete(*self.patient_list.get_children())
-        patients = self.db.get_all_patients()
-        for patient in patients:
-            self.patient_list.insert('', 'end', values=(
-                patient.name,
-                patient.phone,
-                patient.email
-            ))
+        self.patient_pages.reload()
 
     def refresh_services_list(self):
-        self.services_tree.delete(*self.services_tree.get_children())
-        services = self.db.get_all_services()
-        for service in services:
-            self.services_tree.insert('', 'end', values=(
-                service.name,
-                f"฿{service.price:,.2f}",
-                f"{service.duration} mins",
-                service.category
-            ))
+        self.service_pages.reload()
 
     def filter_services(self, category):
         """Filter services list by category"""
@@ -1367,38 +1448,23 @@ class BeautyClinicPOS:
             return
 
         try:
-            for item in selection:
-                item_values = self.cart_list.item(item)['values']
-                # Find and remove the corresponding cart item
-                self.cart_items = [i for i in self.cart_items if i.service_id != item_values[0]]
-
-            self.update_cart_display()
+            # Tree rows are keyed by cart line id
+            for line_id in selection:
+                self.cart.remove(line_id)
         except Exception as e:
             logger.error(f"Error removing item from cart: {e}")
 
-    def update_cart_display(self):
-        """Update the cart display with current items"""
-        try:
-            self.cart_list.delete(*self.cart_list.get_children())
-            total = Decimal('0')
-
-            for item in self.cart_items:
-                service = self.db.get_service(item.service_id)
-                doctor = self.db.get_staff(item.doctor_id)
-                item_total = item.price * item.quantity
-                total += item_total
-
-                self.cart_list.insert('', 'end', values=(
-                    service.name,
-                    doctor.name if doctor else '',
-                    item.quantity,
-                    f"฿{item.price:,.2f}",
-                    f"฿{item_total:,.2f}"
-                ))
-
-            self.subtotal_var.set(f"฿{total:,.2f}")
-        except Exception as e:
-            logger.error(f"Error updating cart display: {e}")
+    def format_cart_line(self, item):
+        """Row values for one cart line"""
+        service = self.db.get_service(item.service_id)
+        doctor = self.db.get_staff(item.doctor_id) if item.doctor_id else None
+        return (
+            service.name if service else '',
+            doctor.name if doctor else '',
+            item.quantity,
+            f"฿{item.price:,.2f}",
+            f"฿{Cart.line_total(item):,.2f}"
+        )
 
     def create_appointment(self, patient_id: str, service_id: str, doctor_id: str):
         """Create an appointment for the service"""
@@ -1426,7 +1492,7 @@ class BeautyClinicPOS:
 
     def calculate_total(self) -> Decimal:
         """Calculate total amount for all items in cart"""
-        return sum(item.price * item.quantity for item in self.cart_items)
+        return self.cart.total
 
     def setup_treatments_tab(self):
         """Setup treatments tracking tab"""
@@ -1735,6 +1801,12 @@ class BeautyClinicPOS:
         patient_frame.pack(fill='x', padx=5, pady=5)
 
         # Search
+        self.notes_patient_search = PatientSearchController(
+            self.root,
+            search_fn=self.db.search_patients,
+            on_results=self.show_patients_for_notes,
+            submit=self.db.submit
+        )
         search_var = tk.StringVar()
         search_var.trace('w', lambda *args: self.search_patients_for_notes(search_var.get()))
         search_entry = ttk.Entry(patient_frame, textvariable=search_var)
@@ -2079,6 +2151,7 @@ class BeautyClinicPOS:
                 # Save optimized version
                 img.save(dest_path, quality=85, optimize=True)
 
+            generate_thumbnails(dest_path)
             return dest_path
 
         except Exception as e:
@@ -2106,13 +2179,8 @@ class BeautyClinicPOS:
     def display_treatment_photo(self, photo_path, label):
         """Display treatment photo in label"""
         try:
-            # Load and resize photo
-            image = Image.open(photo_path)
-            # Calculate size to fit in label (e.g., 200x200)
-            image.thumbnail((200, 200), Image.Resampling.LANCZOS)
-
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(image)
+            # Cached 200x200 thumbnail
+            photo = self.photo_cache.get(photo_path, 200)
 
             # Update label
             label.config(image=photo)
@@ -2123,16 +2191,16 @@ class BeautyClinicPOS:
             label.config(text="Error loading photo")
 
     def search_patients_for_notes(self, search_term: str):
-        """Search patients for doctor notes"""
-        if len(search_term) < 2:
-            return
+        """Search patients for doctor notes (debounced, runs off the UI thread)"""
+        self.notes_patient_search.schedule(search_term)
 
+    def show_patients_for_notes(self, search_term: str, patients):
+        """Display background search results in the doctor notes patient list"""
         try:
-            patients = self.db.search_patients(search_term)
             self.doctor_notes_patient_list.delete(*self.doctor_notes_patient_list.get_children())
 
             for patient in patients:
-                last_visit = self.db.get_patient_last_visit(patient.id)
+                last_visit = patient.last_visit
                 self.doctor_notes_patient_list.insert('', 'end', values=(
                     patient.name,
                     last_visit.strftime("%Y-%m-%d") if last_visit else "No visits"
@@ -2322,18 +2390,13 @@ class BeautyClinicPOS:
                 patient = self.db.get_patient_by_name(patient_name)
 
                 if patient:
-                    # Save each photo
-                    photo_paths = []
-                    for filename in filenames:
-                        photo_path = self.save_progress_photo(filename, patient.id)
-                        photo_paths.append(photo_path)
-
-                    # Update database
-                    self.db.add_progress_photos(patient.id, photo_paths)
-
-                    messagebox.showinfo(
-                        "Success",
-                        self.lang.get_text("photos_added")
+                    # Resize and thumbnail in worker processes, then record
+                    # all photos in one transaction
+                    batch = self.photo_ingest.start(patient.id, filenames)
+                    PhotoImportProgress(
+                        self.root, batch,
+                        title=self.lang.get_text("select_photos"),
+                        on_done=self.on_progress_photos_added
                     )
 
         except Exception as e:
@@ -2343,34 +2406,18 @@ class BeautyClinicPOS:
                 self.lang.get_text("error_adding_photos")
             )
 
-    def save_progress_photo(self, source_path: str, patient_id: str) -> str:
-        """Save progress photo to storage"""
-        from PIL import Image
-        import shutil
-
-        try:
-            # Create photos directory if it doesn't exist
-            photos_dir = os.path.join('static', 'photos', 'progress', patient_id)
-            os.makedirs(photos_dir, exist_ok=True)
-
-            # Generate destination path
-            file_ext = os.path.splitext(source_path)[1]
-            dest_filename = f"progress_{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_ext}"
-            dest_path = os.path.join(photos_dir, dest_filename)
-
-            # Copy and optimize photo
-            with Image.open(source_path) as img:
-                # Resize if too large
-                max_size = (1200, 1200)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                # Save optimized version
-                img.save(dest_path, quality=85, optimize=True)
-
-            return dest_path
-
-        except Exception as e:
-            logger.error(f"Error saving progress photo: {e}")
-            raise
+    def on_progress_photos_added(self, saved, failed):
+        """Report the outcome of a progress photo import"""
+        if saved is None or failed:
+            messagebox.showerror(
+                "Error",
+                self.lang.get_text("error_adding_photos")
+            )
+        if saved:
+            messagebox.showinfo(
+                "Success",
+                self.lang.get_text("photos_added")
+            )
 
     def show_add_user_dialog(self):
         """Show dialog to add new user"""
@@ -2803,10 +2850,22 @@ class BeautyClinicPOS:
             command=self.save_settings
         ).pack(side='bottom', padx=5, pady=10)
 
+    def on_closing(self):
+        """Stop the background workers and close the database, then exit"""
+        try:
+            self.photo_ingest.close()
+            self.photo_cache.close()
+            self.invoice_renderer.close()
+            if self.db:
+                self.db.close()
+        except Exception as e:
+            logger.error(f"Error shutting down: {e}")
+        self.root.destroy()
+
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG)
+    configure_logging()
     app = BeautyClinicPOS()
     app.root.mainloop()
\ No newline at end of file
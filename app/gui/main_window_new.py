@@ -7,6 +7,8 @@ import logging
 from app.gui.theme_config import ThemeConfig
 from app.utils.language_manager import LanguageManager
 from app.database.db_manager import DatabaseManager
+from app.gui.components.photo_cache import PhotoImageCache
+from app.services.photo_ingest import PhotoIngestService
 
 # Import tab classes
 from app.gui.tabs.doctor_notes_tab import DoctorNotesTab
@@ -32,6 +34,10 @@ class BeautyClinicPOS:
             )
             self.db = None
 
+        # One thumbnail cache and photo import pool, shared by the tabs
+        self.photo_cache = PhotoImageCache()
+        self.photo_ingest = PhotoIngestService(self.db)
+
         # Create main window
         logger.debug("Creating root window...")
         self.root = tk.Tk()
@@ -44,6 +50,8 @@ class BeautyClinicPOS:
             self.setup_branding()
             self.setup_gui()
 
+            self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
             logger.debug("Successfully initialized BeautyClinicPOS")
         except Exception as e:
             logger.error(f"Error during initialization: {e}")
@@ -212,7 +220,9 @@ class BeautyClinicPOS:
 
         # Initialize tab contents with proper class instances
         self.patients = PatientsTab(self.patients_frame, self.db, self.lang)
-        self.doctor_notes = DoctorNotesTab(self.doctor_notes_frame, self.db, self.lang)
+        self.doctor_notes = DoctorNotesTab(
+            self.doctor_notes_frame, self.db, self.lang, self.photo_cache, self.photo_ingest
+        )
 
         # Add tabs with proper references
         self.notebook.add(self.patients_frame, text=self.lang.get_text("patients"))
@@ -298,6 +308,17 @@ class BeautyClinicPOS:
             logger.error(f"Error updating UI texts: {e}", exc_info=True)
 
 
+    def on_closing(self):
+        """Stop the background workers and close the database, then exit"""
+        try:
+            self.photo_ingest.close()
+            self.photo_cache.close()
+            if self.db:
+                self.db.close()
+        except Exception as e:
+            logger.error(f"Error shutting down: {e}")
+        self.root.destroy()
+
     def run(self):
         """Start the application"""
         self.root.mainloop()
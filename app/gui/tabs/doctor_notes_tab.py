@@ -3,19 +3,29 @@ from tkinter import ttk, messagebox, filedialog
 import os
 from datetime import datetime
 import logging
-from PIL import Image, ImageTk
 import uuid
 
+from app.gui.components.patient_search import PatientSearchController
+from app.gui.components.photo_gallery import PhotoGallery
+from app.gui.components.photo_import import PhotoImportProgress
+
 logger = logging.getLogger(__name__)
 
 
 class DoctorNotesTab(ttk.Frame):
-    def __init__(self, parent, db, lang):
+    def __init__(self, parent, db, lang, photo_cache, photo_ingest):
+        """
+        Args:
+            photo_cache (PhotoImageCache): The main window's thumbnail cache
+            photo_ingest (PhotoIngestService): The main window's photo import
+                service; the main window closes it on exit
+        """
         super().__init__(parent)
         self.parent = parent
         self.db = db
         self.lang = lang
-        self.photo_references = []  # Keep photo references
+        self.photo_cache = photo_cache
+        self.photo_ingest = photo_ingest
         self.text_widgets = {}  # Dictionary to store text widgets
         self.current_patient = None
         self.pack(fill='both', expand=True)
@@ -86,6 +96,12 @@ class DoctorNotesTab(ttk.Frame):
         ttk.Label(search_frame, text=self.lang.get_text("search")).pack(side='left', padx=5)
         self.search_var = tk.StringVar()
         self.search_var.trace('w', lambda *args: self.search_patients_for_notes(self.search_var.get()))
+        self.search_controller = PatientSearchController(
+            self,
+            search_fn=self.db.search_patients,
+            on_results=self.display_search_results,
+            submit=self.db.submit
+        )
         ttk.Entry(search_frame, textvariable=self.search_var).pack(side='left', fill='x', expand=True, padx=5)
 
         # Add New Patient Button
@@ -238,11 +254,9 @@ class DoctorNotesTab(ttk.Frame):
                 'updated_at': now
             }
 
-            logger.debug(f"Prepared patient data: {patient_data}")
-
             # Save to database
             self.db.add_patient(patient_data)
-            logger.info(f"Successfully added new patient with ID: {patient_id}")
+            logger.info("Added new patient %s", patient_id)
 
             # Show success message
             messagebox.showinfo(
@@ -263,26 +277,23 @@ class DoctorNotesTab(ttk.Frame):
 
     def search_patients_for_notes(self, search_term):
         """Search patients for notes"""
-        logger.debug(f"Searching for patients with term: {search_term}")
+        logger.debug("Searching for patients with term: %s", search_term)
 
         # Clear current patient info when starting a new search
         self.clear_patient_info()
 
-        if len(search_term) < 2:
-            return
+        # Debounced; the query itself runs off the UI thread
+        self.search_controller.schedule(search_term)
 
+    def display_search_results(self, search_term, patients):
+        """Show search results in the patient list"""
         try:
-            # Search for patients
-            patients = self.db.search_patients(search_term)
-            logger.debug(f"Found {len(patients)} patients")
-
             # Clear current list
             self.patient_list.delete(*self.patient_list.get_children())
 
             if patients:
                 for patient in patients:
-                    # Get last visit
-                    last_visit = self.db.get_patient_last_visit(patient.id)
+                    last_visit = patient.last_visit
                     last_visit_str = last_visit.strftime("%Y-%m-%d") if last_visit else "No visits"
 
                     # Insert into treeview
@@ -328,12 +339,11 @@ class DoctorNotesTab(ttk.Frame):
             patient_name = values[0]
 
             # Get patient data
-            patient_dict = self.db.get_patient_by_name(patient_name)
-            if not patient_dict:
+            patient = self.db.get_patient_by_name(patient_name)
+            if not patient:
                 return
 
-            # Store current patient as an object with attributes
-            self.current_patient = type('Patient', (), patient_dict)
+            self.current_patient = patient
 
             # Update displays
             self.update_patient_info(self.current_patient)
@@ -356,7 +366,8 @@ class DoctorNotesTab(ttk.Frame):
     def update_patient_info(self, patient):
         """Update patient info display"""
         try:
-            last_visit = self.db.get_patient_last_visit(patient.id)
+            # PatientRow carries the cached last visit, no query needed
+            last_visit = patient.last_visit
             last_visit_str = last_visit.strftime("%Y-%m-%d") if last_visit else "No previous visits"
 
             info_text = f"""
@@ -451,18 +462,14 @@ class DoctorNotesTab(ttk.Frame):
             )
 
             if filenames:
-                photo_paths = []
-                for filename in filenames:
-                    photo_path = self.save_photo(filename)
-                    photo_paths.append(photo_path)
-
-                # Update database
-                self.db.add_patient_photos(self.current_patient.id, photo_paths)
-                self.load_patient_photos(self.current_patient)
-
-                messagebox.showinfo(
-                    "Success",
-                    self.lang.get_text("photos_added")
+                # Resize and thumbnail in worker processes, then record all
+                # photos in one transaction
+                patient = self.current_patient
+                batch = self.photo_ingest.start(patient.id, filenames)
+                PhotoImportProgress(
+                    self, batch,
+                    title=self.lang.get_text("select_photos"),
+                    on_done=lambda saved, failed: self.on_photos_added(patient, saved, failed)
                 )
 
         except Exception as e:
@@ -472,31 +479,20 @@ class DoctorNotesTab(ttk.Frame):
                 self.lang.get_text("error_adding_photos")
             )
 
-    def save_photo(self, source_path):
-        """Save photo to storage with optimizations"""
-        try:
-            # Create photos directory if it doesn't exist
-            photos_dir = os.path.join('static', 'photos', 'progress', str(self.current_patient.id))
-            os.makedirs(photos_dir, exist_ok=True)
-
-            # Generate destination path
-            file_ext = os.path.splitext(source_path)[1]
-            dest_filename = f"progress_{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_ext}"
-            dest_path = os.path.join(photos_dir, dest_filename)
-
-            # Copy and optimize photo
-            with Image.open(source_path) as img:
-                # Resize if too large
-                max_size = (1200, 1200)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                # Save optimized version
-                img.save(dest_path, quality=85, optimize=True)
-
-            return dest_path
-
-        except Exception as e:
-            logger.error(f"Error saving photo: {e}")
-            raise
+    def on_photos_added(self, patient, saved, failed):
+        """Report the outcome of a photo import"""
+        if saved is None or failed:
+            messagebox.showerror(
+                "Error",
+                self.lang.get_text("error_adding_photos")
+            )
+        if saved:
+            if self.current_patient is not None and self.current_patient.id == patient.id:
+                self.load_patient_photos(patient)
+            messagebox.showinfo(
+                "Success",
+                self.lang.get_text("photos_added")
+            )
 
     def view_all_photos(self):
         """Show all patient photos in a new window"""
@@ -520,59 +516,26 @@ class DoctorNotesTab(ttk.Frame):
         viewer.title(self.lang.get_text("photo_viewer"))
         viewer.geometry("800x600")
 
-        # Create scrollable frame
-        canvas = tk.Canvas(viewer)
-        scrollbar = ttk.Scrollbar(viewer, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        # Add photos to grid
-        row = 0
-        col = 0
-        for photo_path in sorted(photos, key=lambda x: os.path.basename(x).split('_')[1], reverse=True):
-            if os.path.exists(photo_path):
-                photo_frame = self.create_photo_frame(scrollable_frame, photo_path)
-                photo_frame.grid(row=row, column=col, padx=5, pady=5)
-
-                col += 1
-                if col > 2:  # 3 photos per row
-                    col = 0
-                    row += 1
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-    def create_photo_frame(self, parent, photo_path):
-        """Create a frame containing photo and date"""
-        frame = ttk.Frame(parent)
-
+        # Newest first, 3 per row; thumbnails load in the background as
+        # they scroll into view
+        photo_paths = [
+            photo_path
+            for photo_path in sorted(photos, key=lambda x: os.path.basename(x).split('_')[1], reverse=True)
+            if os.path.exists(photo_path)
+        ]
+        PhotoGallery(
+            viewer, photo_paths, self.photo_cache,
+            size=200, columns=3, caption=self.photo_date
+        ).pack(fill="both", expand=True)
+
+    @staticmethod
+    def photo_date(photo_path):
+        """Date taken, from a progress_YYYYMMDD_HHMMSS photo file name"""
         try:
-            with Image.open(photo_path) as img:
-                img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.photo_references.append(photo)
-
-                label = ttk.Label(frame, image=photo)
-                label.image = photo
-                label.pack()
-
-            # Add date from filename
             date_str = os.path.basename(photo_path).split('_')[1]
-            date = datetime.strptime(date_str, '%Y%m%d').strftime('%Y-%m-%d')
-            ttk.Label(frame, text=date).pack()
-
-        except Exception as e:
-            logger.error(f"Error creating photo frame: {e}")
-            ttk.Label(frame, text="Error loading photo").pack()
-
-        return frame
+            return datetime.strptime(date_str, '%Y%m%d').strftime('%Y-%m-%d')
+        except (IndexError, ValueError):
+            return ""
 
     def setup_notes_section(self, parent):
         """Setup the notes section with all text fields"""
@@ -710,14 +673,10 @@ class DoctorNotesTab(ttk.Frame):
         frame.pack(fill='x', padx=5, pady=5)
 
         try:
-            with Image.open(photo_path) as img:
-                img.thumbnail((180, 180), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.photo_references.append(photo)
-
-                label = ttk.Label(frame, image=photo)
-                label.image = photo
-                label.pack()
+            photo = self.photo_cache.get(photo_path, 180)
+            label = ttk.Label(frame, image=photo)
+            label.image = photo
+            label.pack()
 
             # Add date label
             date_str = os.path.basename(photo_path).split('_')[1]
@@ -753,22 +712,16 @@ class DoctorNotesTab(ttk.Frame):
 
         try:
             # Update before photo
-            with Image.open(self.selected_before[0]) as img:
-                img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.photo_references.append(photo)
-                self.before_preview.configure(image=photo)
-                self.before_preview.image = photo
-                self.before_date.configure(text=self.selected_before[1])
+            photo = self.photo_cache.get(self.selected_before[0], 200)
+            self.before_preview.configure(image=photo)
+            self.before_preview.image = photo
+            self.before_date.configure(text=self.selected_before[1])
 
             # Update after photo
-            with Image.open(self.selected_after[0]) as img:
-                img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.photo_references.append(photo)
-                self.after_preview.configure(image=photo)
-                self.after_preview.image = photo
-                self.after_date.configure(text=self.selected_after[1])
+            photo = self.photo_cache.get(self.selected_after[0], 200)
+            self.after_preview.configure(image=photo)
+            self.after_preview.image = photo
+            self.after_date.configure(text=self.selected_after[1])
 
             dialog.destroy()
 
@@ -815,17 +768,14 @@ class DoctorNotesTab(ttk.Frame):
     def update_photo_display(self, photo_path, preview_label, date_label):
         """Update a single photo display"""
         try:
-            with Image.open(photo_path) as img:
-                img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.photo_references.append(photo)
-                preview_label.configure(image=photo)
-                preview_label.image = photo
-
-                # Update date label
-                date_str = os.path.basename(photo_path).split('_')[1]
-                date = datetime.strptime(date_str, '%Y%m%d').strftime('%Y-%m-%d')
-                date_label.configure(text=date)
+            photo = self.photo_cache.get(photo_path, 200)
+            preview_label.configure(image=photo)
+            preview_label.image = photo
+
+            # Update date label
+            date_str = os.path.basename(photo_path).split('_')[1]
+            date = datetime.strptime(date_str, '%Y%m%d').strftime('%Y-%m-%d')
+            date_label.configure(text=date)
         except Exception as e:
             logger.error(f"Error updating photo display: {e}")
 
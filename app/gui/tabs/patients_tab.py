@@ -4,6 +4,9 @@ from datetime import datetime
 import logging
 import uuid
 
+from app.gui.components.paged_treeview import PagedTreeview
+from app.gui.components.patient_search import PatientSearchController
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +25,13 @@ class PatientsTab:
         ttk.Label(search_frame, text=self.lang.get_text("search")).pack(side='left', padx=5)
         self.patient_search_var = tk.StringVar()
         self.patient_search_var.trace('w', self.on_patient_search)
+        self.search_controller = PatientSearchController(
+            self.parent,
+            search_fn=self.db.search_patients,
+            on_results=self.display_search_results,
+            on_error=self.on_search_error,
+            submit=self.db.submit
+        )
         search_entry = ttk.Entry(search_frame, textvariable=self.patient_search_var)
         search_entry.pack(side='left', fill='x', expand=True, padx=5)
 
@@ -72,6 +82,19 @@ class PatientsTab:
         self.patient_list.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
 
+        # Only a window of patients is kept in the tree; pages are fetched
+        # by (name, id) as the user scrolls
+        self.paged_list = PagedTreeview(
+            self.patient_list,
+            scrollbar,
+            fetch_page=self.db.iter_patients,
+            row_values=self.patient_row_values,
+            row_key=self.db.patient_cursor,
+            row_id=lambda patient: patient.id,
+            submit=self.db.submit,
+            on_error=self.on_refresh_error
+        )
+
         # Buttons frame
         buttons_frame = ttk.Frame(self.parent)
         buttons_frame.pack(fill='x', padx=10, pady=5)
@@ -218,93 +241,62 @@ class PatientsTab:
             )
 
     def refresh_patient_list(self):
-        """Refresh the patient list"""
+        """Reload the patient list from the first page"""
         self.update_ui_text()
         logger.debug("Starting patient list refresh")
+        self.paged_list.reload()
+
+    def patient_row_values(self, patient):
+        """Tree row values for one patient"""
+        last_visit = patient.last_visit
+        last_visit_str = last_visit.strftime("%Y-%m-%d") if last_visit else "No visits"
+        return (
+            patient.id,  # Hidden ID column
+            patient.name,
+            patient.phone,
+            patient.email or '',
+            last_visit_str
+        )
+
+    def on_refresh_error(self, error):
+        """Report a failed patient list refresh"""
+        logger.error(f"Error refreshing patient list: {error}", exc_info=error)
+        messagebox.showerror(
+            "Error",
+            self.lang.get_text("error_refreshing_list")
+        )
+
+    def on_patient_search(self, *args):
+        """Handle patient search (debounced, runs off the UI thread)"""
+        search_term = self.patient_search_var.get()
+        if not search_term.strip():
+            # Search cleared: go back to the full, paged list
+            self.search_controller.cancel()
+            self.refresh_patient_list()
+            return
+        self.search_controller.schedule(search_term)
+
+    def on_search_error(self, error):
+        """Report a failed background search"""
+        messagebox.showerror(
+            "Error",
+            self.lang.get_text("error_searching_patients")
+        )
+
+    def display_search_results(self, search_term, patients):
+        """Show search results in the patient list"""
         try:
             # Clear current list
+            self.paged_list.suspend()
             self.patient_list.delete(*self.patient_list.get_children())
 
-            # Get all patients
-            patients = self.db.get_all_patients()
-            logger.debug(f"Retrieved {len(patients)} patients from database")
-
-            if not patients:
-                logger.debug("No patients found")
-                return
-
-            # Add each patient to the list
+            # Display results
             for patient in patients:
-                try:
-                    # Get last visit
-                    patient_id = patient['id']
-                    logger.debug(f"Processing patient {patient['name']} ({patient_id})")
-
-                    last_visit = self.db.get_patient_last_visit(patient_id)
-                    last_visit_str = last_visit.strftime("%Y-%m-%d") if last_visit else "No visits"
-
-                    # Insert into list
-                    self.patient_list.insert('', 'end', values=(
-                        patient_id,  # Hidden ID column
-                        patient['name'],
-                        patient['phone'],
-                        patient.get('email', ''),
-                        last_visit_str
-                    ))
-                    logger.debug(f"Added patient {patient['name']} to list")
-
-                except Exception as e:
-                    logger.error(f"Error processing patient {patient.get('name', 'Unknown')}: {e}")
-                    continue
-
-            logger.debug("Patient list refresh completed successfully")
+                self.patient_list.insert('', 'end', values=self.patient_row_values(patient))
 
         except Exception as e:
-            logger.error(f"Error refreshing patient list: {e}", exc_info=True)
-            messagebox.showerror(
-                "Error",
-                self.lang.get_text("error_refreshing_list")
-            )
-
-    def on_patient_search(self, *args):
-        """Handle patient search"""
-        search_term = self.patient_search_var.get()
-        if len(search_term) >= 2:
-            try:
-                # Clear current list
-                self.patient_list.delete(*self.patient_list.get_children())
-
-                # Search for patients
-                patients = self.db.search_patients(search_term)
-                logger.debug(f"Found {len(patients)} patients matching '{search_term}'")
-
-                # Display results
-                for patient in patients:
-                    # Convert patient object to dictionary if needed
-                    patient_data = patient if isinstance(patient, dict) else {
-                        'id': patient.id,
-                        'name': patient.name,
-                        'phone': patient.phone,
-                        'email': getattr(patient, 'email', '')
-                    }
-
-                    last_visit = self.db.get_patient_last_visit(patient_data['id'])
-                    last_visit_str = last_visit.strftime("%Y-%m-%d") if last_visit else "No visits"
-
-                    self.patient_list.insert('', 'end', values=(
-                        patient_data['id'],
-                        patient_data['name'],
-                        patient_data['phone'],
-                        patient_data.get('email', ''),
-                        last_visit_str
-                    ))
-
-            except Exception as e:
-                logger.error(f"Error searching patients: {e}", exc_info=True)
-                messagebox.showerror(
-                    "Error",
-                    self.lang.get_text("error_searching_patients")
-                )
+            logger.error(f"Error displaying search results: {e}", exc_info=True)
+            self.on_search_error(e)
 
     def show_edit_patient_dialog(self):
         """Show dialog to edit selected patient"""
@@ -338,13 +330,13 @@ class PatientsTab:
 
             # Form fields
             fields = [
-                ("name", "Name*:", patient.get('name', '')),
-                ("phone", "Phone*:", patient.get('phone', '')),
-                ("email", "Email:", patient.get('email', '')),
-                ("address", "Address:", patient.get('address', '')),
-                ("birth_date", "Birth Date:", patient.get('birth_date', '')),
-                ("gender", "Gender:", patient.get('gender', '')),
-                ("emergency_contact", "Emergency Contact:", patient.get('emergency_contact', ''))
+                ("name", "Name*:", patient.name or ''),
+                ("phone", "Phone*:", patient.phone or ''),
+                ("email", "Email:", patient.email or ''),
+                ("address", "Address:", patient.address or ''),
+                ("birth_date", "Birth Date:", patient.birth_date or ''),
+                ("gender", "Gender:", patient.gender or ''),
+                ("emergency_contact", "Emergency Contact:", patient.emergency_contact or '')
             ]
 
             self.edit_form_vars = {}
@@ -375,15 +367,15 @@ class PatientsTab:
             ttk.Label(main_frame, text="Medical History:").pack(anchor='w', pady=(10, 5))
             self.edit_medical_history_text = tk.Text(main_frame, height=4)
             self.edit_medical_history_text.pack(fill='x', pady=5)
-            if patient.get('medical_history'):
-                self.edit_medical_history_text.insert('1.0', patient['medical_history'])
+            if patient.medical_history:
+                self.edit_medical_history_text.insert('1.0', patient.medical_history)
 
             # Notes
             ttk.Label(main_frame, text="Notes:").pack(anchor='w', pady=(10, 5))
             self.edit_notes_text = tk.Text(main_frame, height=4)
             self.edit_notes_text.pack(fill='x', pady=5)
-            if patient.get('notes'):
-                self.edit_notes_text.insert('1.0', patient['notes'])
+            if patient.notes:
+                self.edit_notes_text.insert('1.0', patient.notes)
 
             # Buttons
             buttons_frame = ttk.Frame(main_frame)
@@ -473,6 +465,18 @@ class PatientsTab:
             patient_id = values[0]  # ID is in first column
             patient_name = values[1]  # Name is in second column
 
+            # Sales and treatment history must be kept
+            records = self.db.get_patient_records(patient_id)
+            if records:
+                messagebox.showerror(
+                    "Error",
+                    self.lang.get_text("patient_has_records").format(
+                        name=patient_name,
+                        records=", ".join(f"{count} {table.replace('_', ' ')}" for table, count in records.items())
+                    )
+                )
+                return
+
             # Confirm deletion
             if not messagebox.askyesno(
                     "Confirm Delete",
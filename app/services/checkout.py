@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class CheckoutService:
+    """Record a completed POS sale atomically."""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def checkout(self, patient_id, cart, payment_method, created_by="", notes=""):
+        """
+        Write the transaction, its items and one appointment per item in a
+        single database transaction. Either the whole sale is recorded or,
+        on any error, nothing is. Triggers add it to the daily sales rollup
+        within that same transaction.
+        Args:
+            patient_id (str): Paying patient
+            cart: Iterable of TransactionItem (service_id, quantity, price,
+                discount, doctor_id)
+            payment_method (str): Payment method shown on the invoice
+            created_by (str): Staff member taking the payment
+            notes (str): Free-text transaction notes
+        Returns:
+            str: The new transaction ID
+        """
+        items = list(cart)
+        if not items:
+            raise ValueError("Cannot check out an empty cart")
+
+        transaction_id = str(uuid.uuid4())
+        now = datetime.now()
+        timestamp = now.strftime(TIMESTAMP_FORMAT)
+        # Item discounts are per line, the same as the sales rollup counts them
+        discount = sum((Decimal(item.discount or 0) for item in items), Decimal('0'))
+        total = sum((Decimal(item.price) * item.quantity for item in items), Decimal('0')) - discount
+
+        with self.db.get_connection() as conn:
+            durations = self._service_durations(conn, {item.service_id for item in items})
+
+            conn.execute('''
+                INSERT INTO transactions (
+                    id, patient_id, total_amount, payment_method,
+                    transaction_date, status, notes, discount_amount,
+                    tax_amount, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                transaction_id, patient_id, float(total), payment_method,
+                timestamp, 'completed', notes, float(discount), 0.0, created_by
+            ))
+
+            conn.executemany('''
+                INSERT INTO transaction_items (
+                    id, transaction_id, service_id, doctor_id, quantity,
+                    price, discount, notes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    str(uuid.uuid4()), transaction_id, item.service_id,
+                    item.doctor_id, item.quantity, float(item.price),
+                    float(item.discount), item.notes
+                )
+                for item in items
+            ])
+
+            conn.executemany('''
+                INSERT INTO appointments (
+                    id, patient_id, service_id, doctor_id, start_time,
+                    end_time, status, notes, created_at, modified_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    str(uuid.uuid4()), patient_id, item.service_id, item.doctor_id,
+                    timestamp,
+                    (now + timedelta(minutes=durations.get(item.service_id, 0))).strftime(TIMESTAMP_FORMAT),
+                    'scheduled', '', timestamp, timestamp
+                )
+                for item in items
+            ])
+
+        logger.info("Checked out transaction %s with %d items", transaction_id, len(items))
+        return transaction_id
+
+    @staticmethod
+    def _service_durations(conn, service_ids):
+        """Look up the duration (minutes) of every service in the cart in one query"""
+        rows = conn.execute(
+            'SELECT id, duration FROM services WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(service_ids)),)
+        ).fetchall()
+        return {row['id']: row['duration'] for row in rows}
@@ -0,0 +1,148 @@
+"""Render many invoice PDFs at once across worker processes.
+
+Usage:
+    python -m app.services.invoice_batch --from 2026-09-01 --to 2026-09-30 [--out DIR] [--workers N]
+    python -m app.services.invoice_batch TRANSACTION_ID [TRANSACTION_ID ...]
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import logging
+import math
+import multiprocessing
+import os
+import time
+from typing import NamedTuple
+
+from config import Config
+from app.database.db_manager import DatabaseManager
+from app.utils.invoice_generator import InvoiceGenerator
+
+logger = logging.getLogger(__name__)
+
+# Tasks handed to each worker: several, so a worker that finishes early can
+# take over work from the others
+CHUNKS_PER_WORKER = 4
+
+# Upper bound on invoices per task, so failures and progress stay fine-grained
+MAX_CHUNK_SIZE = 50
+
+# Each worker process keeps one generator (styles, logo) for all its chunks
+_generator = None
+
+
+class BatchReport(NamedTuple):
+    """Outcome of render_invoices"""
+    rendered: list   # Paths of the PDFs written
+    failed: list     # (transaction ID, error message) pairs
+    seconds: float
+
+    @property
+    def per_second(self):
+        return len(self.rendered) / self.seconds if self.seconds else 0.0
+
+
+def _init_worker():
+    global _generator
+    _generator = InvoiceGenerator()
+
+
+def _render_chunk(invoices, out_dir):
+    """
+    Render a list of invoice data dicts in a worker process
+    Returns:
+        tuple: (written paths, list of (transaction ID, error message))
+    """
+    rendered = []
+    failed = []
+    for invoice in invoices:
+        try:
+            rendered.append(str(_generator.generate_invoice(invoice, out_dir)))
+        except Exception as e:
+            failed.append((invoice['transaction_id'], str(e)))
+    return rendered, failed
+
+
+def render_invoices(db_manager, transaction_ids, out_dir=None, workers=None):
+    """
+    Render and write the invoices of many transactions in parallel
+    Args:
+        db_manager: DatabaseManager the transactions are read from
+        transaction_ids (list): Transactions to render
+        out_dir: Where the PDFs are written; defaults to Config.INVOICE_DIR
+        workers (int): Worker processes; defaults to the CPU count
+    Returns:
+        BatchReport: Written paths, failures and elapsed time
+    """
+    start = time.perf_counter()
+    out_dir = str(out_dir or Config.INVOICE_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    # One query for the whole batch; workers never touch the database
+    transaction_ids = list(dict.fromkeys(transaction_ids))
+    invoices = db_manager.get_invoice_data(transaction_ids)
+    failed = [(transaction_id, "Transaction not found")
+              for transaction_id in transaction_ids if transaction_id not in invoices]
+    rendered = []
+
+    pending = list(invoices.values())
+    if pending:
+        # Split the batch so every worker gets work, however small the batch
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        size = min(math.ceil(len(pending) / (workers * CHUNKS_PER_WORKER)), MAX_CHUNK_SIZE)
+        chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        ) as executor:
+            futures = [(chunk, executor.submit(_render_chunk, chunk, out_dir)) for chunk in chunks]
+            for chunk, future in futures:
+                try:
+                    chunk_rendered, chunk_failed = future.result()
+                except Exception as e:
+                    # The worker itself died; the whole chunk is lost
+                    logger.error(f"Error rendering invoices: {e}")
+                    chunk_rendered = []
+                    chunk_failed = [(invoice['transaction_id'], str(e)) for invoice in chunk]
+                rendered.extend(chunk_rendered)
+                failed.extend(chunk_failed)
+
+    report = BatchReport(rendered, failed, time.perf_counter() - start)
+    logger.info(
+        "Rendered %d invoices in %.1fs (%.1f/s), %d failed",
+        len(report.rendered), report.seconds, report.per_second, len(report.failed)
+    )
+    for transaction_id, error in report.failed:
+        logger.error(f"Invoice for transaction {transaction_id} failed: {error}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render invoice PDFs in bulk")
+    parser.add_argument('transaction_ids', nargs='*', help="Transactions to render")
+    parser.add_argument('--from', dest='start', type=date.fromisoformat,
+                        help="Render every transaction from this date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', type=date.fromisoformat,
+                        help="Last date included with --from (default: today)")
+    parser.add_argument('--out', default=Config.INVOICE_DIR, help="Output directory")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    if not args.transaction_ids and not args.start:
+        parser.error("give transaction IDs or --from")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    db = DatabaseManager()
+    try:
+        transaction_ids = list(args.transaction_ids)
+        if args.start:
+            transaction_ids += db.get_transaction_ids(args.start, args.end or date.today())
+        report = render_invoices(db, transaction_ids, args.out, args.workers)
+    finally:
+        db.close()
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import logging
+import multiprocessing
+import os
+import uuid
+
+from PIL import Image
+
+from config import Config
+from app.utils.thumbnails import THUMBNAIL_SIZES, make_thumbnail, save_thumbnail, thumbnail_path
+
+logger = logging.getLogger(__name__)
+
+# Stored photos are scaled down to fit this box (px)
+PHOTO_MAX_SIZE = 1200
+
+
+def process_photo(source_path, dest_path, thumbnail_sizes=THUMBNAIL_SIZES):
+    """
+    Scale a camera photo down for storage and write its thumbnails, decoding
+    it only once. Runs in a worker process.
+    Returns:
+        str: dest_path
+    """
+    with Image.open(source_path) as img:
+        # JPEGs are decoded straight at 1/2..1/8 scale when that still
+        # covers the target size, which is most of the work saved
+        img.draft('RGB', (PHOTO_MAX_SIZE, PHOTO_MAX_SIZE))
+        img.thumbnail((PHOTO_MAX_SIZE, PHOTO_MAX_SIZE), Image.Resampling.LANCZOS)
+        if dest_path.lower().endswith(('.jpg', '.jpeg')) and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.save(dest_path, quality=85, optimize=True)
+
+        # Thumbnails are keyed by the saved file, so write them after it
+        for size in sorted(thumbnail_sizes, reverse=True):
+            img = make_thumbnail(img, size)
+            save_thumbnail(img, thumbnail_path(dest_path, size))
+
+    return dest_path
+
+
+class PhotoBatch:
+    """Photos being ingested for one patient; see PhotoIngestService.start"""
+
+    def __init__(self, db_manager, patient_id, futures):
+        """futures maps each source path to the Future of its process_photo call"""
+        self.db = db_manager
+        self.patient_id = patient_id
+        self.futures = futures
+
+    def __len__(self):
+        return len(self.futures)
+
+    def completed(self):
+        """Number of photos finished (saved or failed)"""
+        return sum(1 for future in self.futures.values() if future.done())
+
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def record(self):
+        """
+        Record the saved photos in one transaction once the batch is done
+        This writes to the database; from the GUI run it through db.submit.
+        Returns:
+            tuple: (saved photo paths, list of (source path, exception) for failures)
+        """
+        saved = []
+        failed = []
+        for source_path, future in self.futures.items():
+            error = future.exception()
+            if error is None:
+                saved.append(future.result())
+            else:
+                logger.error(f"Error processing photo {source_path}: {error}")
+                failed.append((source_path, error))
+
+        if saved:
+            self.db.add_patient_photos(self.patient_id, saved)
+        return saved, failed
+
+
+class PhotoIngestService:
+    """
+    Save batches of progress photos using a process pool.
+
+    The pool is started with the first batch and kept for the service's
+    lifetime, so worker processes (and their PIL imports) are paid for once
+    rather than per batch. Call close() when the application exits.
+    """
+
+    def __init__(self, db_manager, photos_dir=None, max_workers=None):
+        """
+        Args:
+            db_manager: DatabaseManager the photos are recorded in
+            photos_dir: Root of the per-patient progress photo folders
+            max_workers (int): Worker processes; defaults to Config.PHOTO_INGEST_WORKERS
+                or the CPU count
+        """
+        self.db = db_manager
+        self.photos_dir = photos_dir or os.path.join('static', 'photos', 'progress')
+        self.max_workers = max_workers or Config.PHOTO_INGEST_WORKERS or os.cpu_count() or 1
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawned workers stay clear of the Tk and database threads in this process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def start(self, patient_id, source_paths):
+        """
+        Start processing photos in the background
+        Returns:
+            PhotoBatch: Poll it with done()/completed(), then call record()
+        """
+        patient_dir = os.path.join(self.photos_dir, str(patient_id))
+        os.makedirs(patient_dir, exist_ok=True)
+
+        executor = self._get_executor()
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        futures = {}
+        for source_path in source_paths:
+            # The random suffix keeps photos taken in the same second apart
+            file_ext = os.path.splitext(source_path)[1]
+            dest_path = os.path.join(patient_dir, f"progress_{stamp}_{uuid.uuid4().hex[:8]}{file_ext}")
+            futures[source_path] = executor.submit(process_photo, source_path, dest_path)
+
+        return PhotoBatch(self.db, patient_id, futures)
+
+    def close(self):
+        """Stop the worker processes, cancelling photos not yet started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
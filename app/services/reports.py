@@ -0,0 +1,245 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import logging
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Prefix of transaction_date ('YYYY-MM-DD HH:MM:SS') or sale_date
+# ('YYYY-MM-DD') that each period groups on
+PERIOD_LENGTHS = {'day': 10, 'month': 7, 'year': 4}
+
+# Only completed sales count towards revenue
+COMPLETED = 'completed'
+
+# transaction_date format, see app.services.checkout
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _amount(value):
+    """SUM() of a REAL money column as a Decimal rounded to cents"""
+    return Decimal(str(round(value or 0, 2)))
+
+
+class SalesSummary(NamedTuple):
+    transactions: int
+    revenue: Decimal
+    discounts: Decimal
+    tax: Decimal
+
+
+class PeriodSales(NamedTuple):
+    period: str          # '2026-09-30', '2026-09' or '2026'
+    transactions: int
+    revenue: Decimal
+
+
+class ServiceSales(NamedTuple):
+    service_id: str
+    service_name: Optional[str]
+    quantity: int
+    revenue: Decimal     # Line totals after item discounts
+
+
+class PaymentSales(NamedTuple):
+    payment_method: str
+    transactions: int
+    revenue: Decimal
+
+
+class StaffSales(NamedTuple):
+    staff_id: str        # '' for items sold without a doctor
+    staff_name: Optional[str]
+    quantity: int
+    revenue: Decimal
+
+
+class SalesReport(NamedTuple):
+    start: date
+    end: date
+    summary: SalesSummary
+    by_period: list
+    by_service: list
+    by_payment_method: list
+    by_staff: list
+
+
+class ReportService:
+    """
+    Sales reports aggregated inside SQLite.
+
+    Every figure is a GROUP BY, so only aggregated rows ever reach Python.
+    Ranges of whole days are read from the daily sales rollup tables (see
+    app.database.maintenance), which triggers keep current on every sale: a
+    year costs the same whether the clinic made a hundred sales or a hundred
+    thousand. Ranges that start or end part way through a day are aggregated
+    from the transactions themselves, over the idx_transactions_date
+    covering index.
+    """
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def sales_report(self, start, end, period='day'):
+        """
+        Sales between two dates or times
+        Args:
+            start (date or datetime): First day included, or the time from
+                which sales count
+            end (date or datetime): Last day included, or the time before
+                which sales count
+            period (str): Grouping of by_period: 'day', 'month' or 'year'
+        Returns:
+            SalesReport
+        """
+        if isinstance(start, datetime) or isinstance(end, datetime):
+            return self.transactions_report(start, end, period)
+        return self._rollup_report(start, end, period)
+
+    @staticmethod
+    def _bounds(start, end):
+        """Half-open transaction_date range [start, end) as text"""
+        # A date as end includes that whole day
+        if not isinstance(start, datetime):
+            start = datetime.combine(start, time())
+        if not isinstance(end, datetime):
+            end = datetime.combine(end + timedelta(days=1), time())
+        # transaction_date sorts as text, so a time range is a string range
+        # over the idx_transactions_date index
+        return start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)
+
+    def transactions_report(self, start, end, period='day'):
+        """
+        Sales between two dates or times, aggregated from the transactions
+        themselves rather than the daily rollup
+        Args:
+            start (date or datetime): First day included, or the time from
+                which sales count
+            end (date or datetime): Last day included, or the time before
+                which sales count
+            period (str): Grouping of by_period: 'day', 'month' or 'year'
+        Returns:
+            SalesReport
+        """
+        length = PERIOD_LENGTHS[period]
+        params = (*self._bounds(start, end), COMPLETED)
+        with self.db.read_connection() as conn:
+            totals = conn.execute('''
+                SELECT COUNT(*), SUM(total_amount), SUM(discount_amount), SUM(tax_amount)
+                FROM transactions
+                WHERE transaction_date >= ? AND transaction_date < ? AND status = ?
+            ''', params).fetchone()
+
+            by_period = conn.execute(f'''
+                SELECT substr(transaction_date, 1, {length}) AS period,
+                       COUNT(*), SUM(total_amount)
+                FROM transactions
+                WHERE transaction_date >= ? AND transaction_date < ? AND status = ?
+                GROUP BY period
+                ORDER BY period
+            ''', params).fetchall()
+
+            by_payment_method = conn.execute('''
+                SELECT payment_method, COUNT(*), SUM(total_amount) AS revenue
+                FROM transactions
+                WHERE transaction_date >= ? AND transaction_date < ? AND status = ?
+                GROUP BY payment_method
+                ORDER BY revenue DESC
+            ''', params).fetchall()
+
+            by_service = conn.execute('''
+                SELECT ti.service_id, s.name,
+                       SUM(ti.quantity),
+                       SUM(ti.quantity * ti.price - COALESCE(ti.discount, 0)) AS revenue
+                FROM transactions t
+                JOIN transaction_items ti ON ti.transaction_id = t.id
+                LEFT JOIN services s ON s.id = ti.service_id
+                WHERE t.transaction_date >= ? AND t.transaction_date < ? AND t.status = ?
+                GROUP BY ti.service_id
+                ORDER BY revenue DESC
+            ''', params).fetchall()
+
+            by_staff = conn.execute('''
+                SELECT COALESCE(ti.doctor_id, '') AS staff_id, st.name,
+                       SUM(ti.quantity),
+                       SUM(ti.quantity * ti.price - COALESCE(ti.discount, 0)) AS revenue
+                FROM transactions t
+                JOIN transaction_items ti ON ti.transaction_id = t.id
+                LEFT JOIN staff st ON st.id = ti.doctor_id
+                WHERE t.transaction_date >= ? AND t.transaction_date < ? AND t.status = ?
+                GROUP BY staff_id
+                ORDER BY revenue DESC
+            ''', params).fetchall()
+
+        return self._report(start, end, totals, by_period, by_service, by_payment_method, by_staff)
+
+    def _rollup_report(self, start, end, period):
+        """Sales of whole days, read from daily_sales_totals and daily_sales_rollup"""
+        length = PERIOD_LENGTHS[period]
+        bounds = (start.isoformat(), end.isoformat())
+        with self.db.read_connection() as conn:
+            totals = conn.execute('''
+                SELECT SUM(transactions), SUM(revenue), SUM(discounts), SUM(tax)
+                FROM daily_sales_totals
+                WHERE sale_date BETWEEN ? AND ?
+            ''', bounds).fetchone()
+
+            by_period = conn.execute(f'''
+                SELECT substr(sale_date, 1, {length}) AS period,
+                       SUM(transactions), SUM(revenue)
+                FROM daily_sales_totals
+                WHERE sale_date BETWEEN ? AND ?
+                GROUP BY period
+                ORDER BY period
+            ''', bounds).fetchall()
+
+            by_payment_method = conn.execute('''
+                SELECT payment_method, SUM(transactions), SUM(revenue) AS total
+                FROM daily_sales_totals
+                WHERE sale_date BETWEEN ? AND ?
+                GROUP BY payment_method
+                ORDER BY total DESC
+            ''', bounds).fetchall()
+
+            by_service = conn.execute('''
+                SELECT r.service_id, s.name, SUM(r.quantity), SUM(r.revenue) AS total
+                FROM daily_sales_rollup r
+                LEFT JOIN services s ON s.id = r.service_id
+                WHERE r.sale_date BETWEEN ? AND ?
+                GROUP BY r.service_id
+                ORDER BY total DESC
+            ''', bounds).fetchall()
+
+            by_staff = conn.execute('''
+                SELECT r.staff_id, st.name, SUM(r.quantity), SUM(r.revenue) AS total
+                FROM daily_sales_rollup r
+                LEFT JOIN staff st ON st.id = r.staff_id
+                WHERE r.sale_date BETWEEN ? AND ?
+                GROUP BY r.staff_id
+                ORDER BY total DESC
+            ''', bounds).fetchall()
+
+        return self._report(start, end, totals, by_period, by_service, by_payment_method, by_staff)
+
+    @staticmethod
+    def _report(start, end, totals, by_period, by_service, by_payment_method, by_staff):
+        """Build a SalesReport from the rows of either path"""
+        return SalesReport(
+            start=start,
+            end=end,
+            summary=SalesSummary(totals[0] or 0, _amount(totals[1]), _amount(totals[2]), _amount(totals[3])),
+            by_period=[PeriodSales(row[0], row[1], _amount(row[2])) for row in by_period],
+            by_service=[ServiceSales(row[0], row[1], row[2], _amount(row[3])) for row in by_service],
+            by_payment_method=[PaymentSales(row[0], row[1], _amount(row[2])) for row in by_payment_method],
+            by_staff=[StaffSales(row[0], row[1], row[2], _amount(row[3])) for row in by_staff],
+        )
+
+    def daily_report(self, day):
+        """Sales of one day"""
+        return self.sales_report(day, day)
+
+    def monthly_report(self, day):
+        """Sales of the calendar month containing day, by day"""
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return self.sales_report(start, end)
@@ -1,41 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+import logging
 import os
+from pathlib import Path
+
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Company details printed on invoices and receipts
+INVOICE_TEMPLATE = {
+    'company_name': 'Wellness by BFF',
+    'address': '239 Asoke soi. Sukhumwit Rd, Wattana Bangkok 10110',
+    'phone': '081-847-0000',
+    'email': 'ice@dricebeauty.com',
+    'website': 'www.dricebeauty.com',
+    'logo_path': os.path.join('static', 'assets', 'logo.jpeg'),
+    'footer_text': 'Thank you for choosing our services!',
+    'terms_conditions': [
+        'Payment is due at the time of service',
+        'Cancellations require 24-hour notice',
+        'Gift certificates are non-refundable'
+    ]
+}
+
+
 class InvoiceGenerator:
+    """
+    Build invoice PDFs.
+
+    Styles, the table style and the logo are prepared once per generator,
+    so keep one around rather than creating one per invoice. A generator is
+    not thread-safe; InvoiceRenderer gives it a thread of its own.
+    """
+
     def __init__(self):
-        self.invoice_template = {
-            'company_name': 'Wellness by BFF',
-            'address': '239 Asoke soi. Sukhumwit Rd, Wattana Bangkok 10110',
-            'phone': '081-847-0000',
-            'email': 'ice@dricebeauty.com',
-            'website': 'www.dricebeauty.com',
-            'logo_path': os.path.join('static', 'assets', 'logo.jpeg'),
-            'footer_text': 'Thank you for choosing our services!',
-            'terms_conditions': [
-                'Payment is due at the time of service',
-                'Cancellations require 24-hour notice',
-                'Gift certificates are non-refundable'
-            ]
-        }
-
-    def generate_invoice(self, transaction_data):
-        doc = SimpleDocTemplate(
-            f"invoices/invoice_{transaction_data['invoice_number']}.pdf",
-            pagesize=letter
-        )
+        self.invoice_template = dict(INVOICE_TEMPLATE)
 
+        self.styles = getSampleStyleSheet()
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.pink),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.pink)
+        ])
+
+        # Read the logo once; each invoice embeds it from memory
+        self.logo = None
+        if os.path.exists(self.invoice_template['logo_path']):
+            with open(self.invoice_template['logo_path'], 'rb') as f:
+                self.logo = f.read()
+
+    def build_story(self, transaction_data):
+        """Flowables for one invoice"""
+        styles = self.styles
         story = []
 
         # Add logo
-        if os.path.exists(self.invoice_template['logo_path']):
-            img = Image(self.invoice_template['logo_path'], width=200, height=100)
-            story.append(img)
+        if self.logo:
+            story.append(Image(io.BytesIO(self.logo), width=200, height=100))
 
         # Add company information
-        styles = getSampleStyleSheet()
         story.append(Paragraph(self.invoice_template['company_name'], styles['Title']))
         story.append(Paragraph(self.invoice_template['address'], styles['Normal']))
         story.append(Paragraph(self.invoice_template['phone'], styles['Normal']))
@@ -46,33 +83,30 @@ class InvoiceGenerator:
         story.append(Paragraph(f"Date: {transaction_data['date']}", styles['Normal']))
         story.append(Paragraph(f"Patient: {transaction_data['patient_name']}", styles['Normal']))
 
-        # Add items table
-        data = [['Service', 'Quantity', 'Price', 'Total']]
+        # Add items table; Total is the line amount before its discount
+        data = [['Service', 'Quantity', 'Price', 'Discount', 'Total']]
         for item in transaction_data['items']:
+            discount = item.get('discount', 0)
             data.append([
                 item['service'],
                 item['quantity'],
                 f"${item['price']:.2f}",
+                f"-${discount:.2f}" if discount else '',
                 f"${item['total']:.2f}"
             ])
 
         table = Table(data)
-        table.setStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.pink),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.pink)
-        ])
+        table.setStyle(self.table_style)
         story.append(table)
 
-        # Add total
+        # Add totals, so the lines visibly add up to the amount charged
+        totals = [['Subtotal', f"${transaction_data['subtotal']:.2f}"]]
+        if transaction_data['discount_amount']:
+            totals.append(['Discount', f"-${transaction_data['discount_amount']:.2f}"])
+        if transaction_data['tax_amount']:
+            totals.append(['Tax', f"${transaction_data['tax_amount']:.2f}"])
+        story.append(Spacer(1, 10))
+        story.append(Table(totals, hAlign='RIGHT'))
         story.append(Paragraph(
             f"Total Amount: ${transaction_data['total_amount']:.2f}",
             styles['Heading2']
@@ -81,6 +115,80 @@ class InvoiceGenerator:
         # Add footer
         story.append(Spacer(1, 30))
         story.append(Paragraph(self.invoice_template['footer_text'], styles['Normal']))
+        return story
+
+    def render(self, transaction_data):
+        """
+        Render an invoice in memory
+        Returns:
+            bytes: The PDF
+        """
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
+        doc.build(self.build_story(transaction_data))
+        return buffer.getvalue()
+
+    def invoice_path(self, transaction_data, out_dir=None):
+        return Path(out_dir or Config.INVOICE_DIR) / f"invoice_{transaction_data['invoice_number']}.pdf"
+
+    def generate_invoice(self, transaction_data, out_dir=None):
+        """
+        Render an invoice and write it to out_dir (default Config.INVOICE_DIR)
+        Returns:
+            Path: The PDF file
+        """
+        pdf = self.render(transaction_data)
+        path = self.invoice_path(transaction_data, out_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(pdf)
+        return path
+
+
+class InvoiceRenderer:
+    """
+    Render invoices on a background thread so checkout never waits on ReportLab.
+
+    Holds one InvoiceGenerator for its lifetime and a single worker thread,
+    which both keeps the generator's shared styles safe and keeps invoices
+    from competing with the UI for more than one core.
+    """
+
+    def __init__(self, db_manager, generator=None, out_dir=None):
+        """
+        Args:
+            db_manager: DatabaseManager the transactions are read from
+            generator (InvoiceGenerator): Defaults to a new one
+            out_dir: Where invoice PDFs are written; defaults to Config.INVOICE_DIR
+        """
+        self.db = db_manager
+        self.generator = generator or InvoiceGenerator()
+        self.out_dir = out_dir
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='invoices')
+
+    def render(self, transaction_data):
+        """
+        Render an invoice to memory in the background
+        Returns:
+            Future: Resolves to the PDF bytes
+        """
+        return self.executor.submit(self.generator.render, transaction_data)
+
+    def submit(self, transaction_id):
+        """
+        Load a transaction, render its invoice and write the PDF, in the background
+        Returns:
+            Future: Resolves to the invoice Path; see app.gui.components.async_result
+                for handing it back to the Tk thread
+        """
+        return self.executor.submit(self._generate, transaction_id)
+
+    def _generate(self, transaction_id):
+        transaction_data = self.db.get_invoice_data([transaction_id]).get(transaction_id)
+        if transaction_data is None:
+            raise ValueError(f"Transaction not found: {transaction_id}")
+        path = self.generator.generate_invoice(transaction_data, self.out_dir)
+        logger.info("Wrote invoice %s", path)
+        return path
 
-        # Generate PDF
-        doc.build(story)
\ No newline at end of file
+    def close(self):
+        self.executor.shutdown(wait=True)
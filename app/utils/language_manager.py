@@ -69,7 +69,8 @@ class LanguageManager:
                 'medical_history': 'Medical History',
                 'error_loading_patient': 'Error loading patient data',
                 'patient_not_found': 'Patient not found',
-                'select_patient_to_edit': 'Please select a patient to edit'
+                'select_patient_to_edit': 'Please select a patient to edit',
+                'patient_has_records': '{name} cannot be deleted because they have {records} on file'
                 # Add more default translations
             },
             'th': {
@@ -94,7 +95,8 @@ class LanguageManager:
                 'medical_history': 'ประวัติการรักษา',
                 'error_loading_patient': 'เกิดข้อผิดพลาดในการโหลดข้อมูลผู้ป่วย',
                 'patient_not_found': 'ไม่พบข้อมูลผู้ป่วย',
-                'select_patient_to_edit': 'กรุณาเลือกผู้ป่วยที่ต้องการแก้ไข'
+                'select_patient_to_edit': 'กรุณาเลือกผู้ป่วยที่ต้องการแก้ไข',
+                'patient_has_records': 'ไม่สามารถลบ {name} ได้ เนื่องจากมีข้อมูล {records} ในระบบ'
                 # Add more default translations
             }
         }
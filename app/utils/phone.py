@@ -0,0 +1,80 @@
+import re
+
+import phonenumbers
+
+from config import Config
+
+# Characters staff commonly type as separators inside a phone number
+_PHONE_SEPARATORS = re.compile(r'[\s\-().]')
+_PHONE_QUERY = re.compile(r'^\+?\d+$')
+
+
+def digits_only(value):
+    """Strip everything but the digits from a phone number"""
+    return ''.join(ch for ch in value or '' if ch.isdigit())
+
+
+def normalize_phone(phone, region=None):
+    """
+    Normalize a phone number for indexing
+    Args:
+        phone (str): Number as typed by staff, in any format
+        region (str): Default region for numbers without a country code
+    Returns:
+        str: E.164 form (e.g. '+66812345678') when the number can be parsed,
+             otherwise its digits only; None for an empty value
+    """
+    if not phone or not phone.strip():
+        return None
+
+    try:
+        number = phonenumbers.parse(phone, region or Config.PHONE_REGION)
+        if phonenumbers.is_possible_number(number):
+            return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+    except phonenumbers.NumberParseException:
+        pass
+
+    return digits_only(phone) or None
+
+
+def reversed_phone(normalized):
+    """Reversed digits of a normalized number, so suffix lookups become prefix lookups"""
+    digits = digits_only(normalized)
+    return digits[::-1] if digits else None
+
+
+def is_phone_query(search_term):
+    """Check whether a search term looks like (part of) a phone number"""
+    return bool(_PHONE_QUERY.match(_PHONE_SEPARATORS.sub('', search_term or '')))
+
+
+def phone_query_prefixes(search_term, region=None):
+    """
+    Prefixes of phone_normalized that a partially typed number can match
+    Args:
+        search_term (str): Digit-only query, possibly with separators
+        region (str): Region used to read numbers typed in national format
+    Returns:
+        list: Distinct prefixes, e.g. ['0812', '+66812'] for '0812' in TH
+    """
+    region = region or Config.PHONE_REGION
+    typed = _PHONE_SEPARATORS.sub('', search_term)
+    digits = digits_only(typed)
+    if not digits:
+        return []
+
+    # Numbers stored without a parseable country code keep their raw digits
+    prefixes = [digits, '+' + digits]
+
+    if not typed.startswith('+'):
+        # National format: drop the trunk prefix and add the country code
+        metadata = phonenumbers.PhoneMetadata.metadata_for_region(region)
+        country_code = phonenumbers.country_code_for_region(region)
+        national = digits
+        trunk = metadata.national_prefix if metadata else None
+        if trunk and national.startswith(trunk):
+            national = national[len(trunk):]
+        if country_code:
+            prefixes.append(f'+{country_code}{national}')
+
+    return list(dict.fromkeys(prefixes))
@@ -0,0 +1,266 @@
+from decimal import Decimal
+import html
+import logging
+from pathlib import Path
+import re
+
+from config import Config
+from app.utils.invoice_generator import INVOICE_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+# Characters per line on an 80mm thermal printer (font A)
+THERMAL_WIDTH = 48
+
+_TOKEN = re.compile(r'\{\{\s*([\w.]+)\s*\}\}|\{%\s*(.*?)\s*%\}')
+_FOR = re.compile(r'for\s+(\w+)\s+in\s+([\w.]+)$')
+
+
+def _lookup(path):
+    """Compile a dotted name into a function fetching it from a context dict"""
+    keys = path.split('.')
+
+    def get(context):
+        value = context
+        for key in keys:
+            if isinstance(value, dict):
+                value = value.get(key)
+            else:
+                value = getattr(value, key, None)
+            if value is None:
+                return None
+        return value
+    return get
+
+
+def _variable(path):
+    get = _lookup(path)
+
+    def render(context):
+        value = get(context)
+        return '' if value is None else html.escape(str(value))
+    return render
+
+
+def _loop(name, path, body):
+    get = _lookup(path)
+
+    def render(context):
+        scope = dict(context)
+        out = []
+        for value in get(context) or ():
+            scope[name] = value
+            out.extend(part if part.__class__ is str else part(scope) for part in body)
+        return ''.join(out)
+    return render
+
+
+class Template:
+    """
+    A compiled HTML template.
+
+    Supports the subset the templates in Config.TEMPLATES_DIR use:
+    {{ name }} / {{ item.field }} substitutions (HTML-escaped) and
+    {% for item in items %} ... {% endfor %} loops. Compiling turns the
+    source into a flat list of literal strings and render functions, so
+    rendering is just one pass of lookups and a join.
+    """
+
+    def __init__(self, source, name='<string>'):
+        self.name = name
+        self.parts = self._compile(source)
+
+    def _compile(self, source):
+        stack = [[]]
+        loops = []
+        position = 0
+        for match in _TOKEN.finditer(source):
+            if match.start() > position:
+                stack[-1].append(source[position:match.start()])
+            position = match.end()
+
+            variable, tag = match.groups()
+            if variable:
+                stack[-1].append(_variable(variable))
+            elif tag == 'endfor':
+                if not loops:
+                    raise ValueError(f"{self.name}: unexpected endfor")
+                body = stack.pop()
+                stack[-1].append(_loop(*loops.pop(), body))
+            else:
+                loop = _FOR.match(tag)
+                if not loop:
+                    raise ValueError(f"{self.name}: unsupported tag {{% {tag} %}}")
+                loops.append(loop.groups())
+                stack.append([])
+
+        if loops:
+            raise ValueError(f"{self.name}: missing endfor")
+        stack[-1].append(source[position:])
+        return stack[0]
+
+    def render(self, context):
+        return ''.join(part if part.__class__ is str else part(context) for part in self.parts)
+
+
+class ReceiptRenderer:
+    """
+    Render receipts from the HTML templates, or as plain text for a thermal
+    printer, without going through ReportLab.
+
+    Templates are read and compiled once, when the renderer is created.
+    Input is the invoice data returned by DatabaseManager.get_invoice_data.
+    """
+
+    def __init__(self, templates_dir=None, company=None):
+        templates_dir = Path(templates_dir or Config.TEMPLATES_DIR)
+        self.templates = {}
+        for name in ('receipt', 'invoice'):
+            path = templates_dir / f'{name}.html'
+            self.templates[name] = Template(path.read_text(encoding='utf-8'), path.name)
+
+        company = company or INVOICE_TEMPLATE
+        logo_path = Path(company['logo_path'])
+        self.company = {
+            'company_name': company['company_name'],
+            'company_address': company['address'],
+            'company_phone': company['phone'],
+            'company_email': company['email'],
+            'footer_text': company['footer_text'],
+            'logo_url': logo_path.resolve().as_uri() if logo_path.exists() else '',
+            'social_media_handles': company['website'],
+            'qr_code': '',
+        }
+
+        # Lines that are the same on every thermal receipt
+        self.thermal_header = [
+            company['company_name'].center(THERMAL_WIDTH).rstrip(),
+            *(line.center(THERMAL_WIDTH).rstrip()
+              for line in _wrap(company['address'], THERMAL_WIDTH)),
+            f"Tel: {company['phone']}".center(THERMAL_WIDTH).rstrip(),
+        ]
+        self.thermal_footer = [
+            line.center(THERMAL_WIDTH).rstrip()
+            for line in _wrap(company['footer_text'], THERMAL_WIDTH)
+        ]
+
+    def context(self, invoice):
+        """Template variables for one transaction's invoice data"""
+        date, _, time = str(invoice['date']).partition(' ')
+        taxable = invoice['subtotal'] - invoice['discount_amount']
+        tax_rate = invoice['tax_amount'] * 100 / taxable if taxable else Decimal('0')
+        return {
+            **self.company,
+            'receipt_number': invoice['invoice_number'],
+            'invoice_number': invoice['invoice_number'],
+            'transaction_date': date,
+            'transaction_time': time[:8],
+            'invoice_date': date,
+            'due_date': date,
+            'client_name': invoice['patient_name'],
+            'client_phone': invoice['patient_phone'],
+            'client_email': invoice['patient_email'],
+            'items': [
+                {
+                    'service': item['service'],
+                    'description': item['description'],
+                    'quantity': item['quantity'],
+                    'price': _money(item['price']),
+                    'total': _money(item['total']),
+                }
+                for item in invoice['items']
+            ],
+            'subtotal': _money(invoice['subtotal']),
+            'tax_rate': f"{tax_rate:.0f}",
+            'tax_amount': _money(invoice['tax_amount']),
+            'total': _money(invoice['total_amount']),
+            'payment_method': invoice['payment_method'],
+        }
+
+    def render_html(self, invoice, template='receipt'):
+        """
+        Fill an HTML template ('receipt' or 'invoice') with invoice data
+        Returns:
+            str: The HTML document
+        """
+        return self.templates[template].render(self.context(invoice))
+
+    def render_text(self, invoice):
+        """
+        Lay out a receipt for an 80mm thermal printer
+        Returns:
+            str: THERMAL_WIDTH-column plain text
+        """
+        divider = '-' * THERMAL_WIDTH
+        date, _, time = str(invoice['date']).partition(' ')
+        lines = [
+            *self.thermal_header,
+            divider,
+            f"Receipt #: {invoice['invoice_number']}",
+            f"Date: {date} {time[:8]}".rstrip(),
+            f"Client: {invoice['patient_name']}",
+            divider,
+        ]
+        for item in invoice['items']:
+            amount = f"{item['quantity']} x {_money(item['price'])}"
+            lines.extend(_columns(item['service'], amount))
+        lines.append(divider)
+        lines.extend(_columns("Subtotal", _money(invoice['subtotal'])))
+        if invoice['discount_amount']:
+            lines.extend(_columns("Discount", f"-{_money(invoice['discount_amount'])}"))
+        if invoice['tax_amount']:
+            lines.extend(_columns("Tax", _money(invoice['tax_amount'])))
+        lines.extend(_columns("TOTAL", _money(invoice['total_amount'])))
+        lines.extend(_columns("Payment", invoice['payment_method'] or ''))
+        lines.append(divider)
+        lines.extend(self.thermal_footer)
+        return '\n'.join(lines) + '\n'
+
+    def save(self, invoice, out_dir=None):
+        """
+        Write a transaction's HTML and thermal text receipts
+        Returns:
+            tuple: (HTML path, text path)
+        """
+        out_dir = Path(out_dir or Config.RECEIPT_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        html_path = out_dir / f"receipt_{invoice['invoice_number']}.html"
+        text_path = out_dir / f"receipt_{invoice['invoice_number']}.txt"
+        html_path.write_text(self.render_html(invoice), encoding='utf-8')
+        text_path.write_text(self.render_text(invoice), encoding='utf-8')
+        return html_path, text_path
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def _wrap(text, width):
+    """Split text into lines of at most width characters, on spaces where possible"""
+    lines = []
+    line = ''
+    for word in str(text).split():
+        while len(word) > width:
+            if line:
+                lines.append(line)
+                line = ''
+            lines.append(word[:width])
+            word = word[width:]
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _columns(left, right, width=THERMAL_WIDTH):
+    """Left text with right text aligned to the edge, wrapping long left text"""
+    right = str(right)
+    lines = _wrap(left, width) or ['']
+    if len(lines[-1]) + 1 + len(right) > width:
+        lines.append('')
+    lines[-1] = lines[-1].ljust(width - len(right)) + right
+    return lines
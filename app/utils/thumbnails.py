@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from PIL import Image
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes (px) the GUI shows photos at: selection lists and previews
+THUMBNAIL_SIZES = (180, 200)
+
+
+def thumbnail_path(photo_path, size):
+    """
+    Path of the cached thumbnail for a photo
+    The key covers the photo's absolute path, modification time and file
+    size, so a photo replaced in place gets a fresh thumbnail.
+    """
+    stat = os.stat(photo_path)
+    key = f"{os.path.abspath(photo_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return Path(Config.THUMBNAIL_DIR) / digest[:2] / f"{digest}_{size}.jpg"
+
+
+def make_thumbnail(img, size):
+    """Shrink an open image in place to fit a size x size box, ready to save as JPEG"""
+    # For JPEGs, let the decoder downscale by 1/2..1/8 before the resample
+    img.draft('RGB', (size, size))
+    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    return img
+
+
+def save_thumbnail(img, path):
+    """Save a thumbnail image to its cache path"""
+    # Write to a temporary file first so readers never see a partial thumbnail
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    img.save(tmp_path, 'JPEG', quality=85)
+    os.replace(tmp_path, path)
+
+
+def generate_thumbnails(photo_path, sizes=THUMBNAIL_SIZES):
+    """
+    Write the cached thumbnails of a photo, decoding it once
+    Returns:
+        dict: Size to thumbnail path
+    """
+    paths = {size: thumbnail_path(photo_path, size) for size in sizes}
+    with Image.open(photo_path) as img:
+        # Largest first, so each smaller size is cut from the previous one
+        for size in sorted(sizes, reverse=True):
+            img = make_thumbnail(img, size)
+            save_thumbnail(img, paths[size])
+    return paths
+
+
+def ensure_thumbnail(photo_path, size):
+    """
+    Get the path of a photo's thumbnail, generating it on a cache miss
+    Returns:
+        Path: Thumbnail file
+    """
+    path = thumbnail_path(photo_path, size)
+    if not path.exists():
+        logger.debug("Generating %dpx thumbnail for %s", size, photo_path)
+        generate_thumbnails(photo_path, (size,))
+    return path
+
+
+def load_thumbnail(photo_path, size):
+    """Get a photo's thumbnail as a decoded PIL image (safe to call off the UI thread)"""
+    with Image.open(ensure_thumbnail(photo_path, size)) as img:
+        img.load()
+        return img
@@ -12,10 +12,11 @@ class Config:
     STATIC_DIR = BASE_DIR / 'static'
 
     # Directory paths - converted to Path objects
-    DATABASE_PATH = BASE_DIR / 'data' / 'clinic_pos.db'
     BACKUP_DIR = BASE_DIR / 'backups'
     LOG_DIR = BASE_DIR / 'logs'
     RECEIPT_DIR = BASE_DIR / 'receipts'
+    INVOICE_DIR = BASE_DIR / 'invoices'
+    THUMBNAIL_DIR = Path(os.getenv('THUMBNAIL_DIR', BASE_DIR / 'cache' / 'thumbnails'))
 
     # Static file paths
     STATIC_ASSETS = STATIC_DIR / 'assets'
@@ -24,7 +25,33 @@ class Config:
     # Environment-based configuration
     ENV = os.getenv('APP_ENV', 'development')
 
+    # Logging: the profile sets the defaults (see app/utils/logging.py);
+    # LOG_LEVEL overrides the root level and LOG_LEVELS sets per-module
+    # levels, e.g. "app.database=DEBUG,app.gui=INFO"
+    LOG_PROFILE = os.getenv('LOG_PROFILE', 'production' if ENV == 'production' else 'development')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', '').upper()
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # text or json
+
+    # Insert sample patients into an empty database at startup (development only)
+    SEED_TEST_DATA = os.getenv('APP_SEED_DATA', 'false').lower() in ('1', 'true', 'yes')
+
     # Database configuration
+    DATABASE_PATH = Path(os.getenv('DATABASE_PATH', BASE_DIR / 'data' / 'clinic_pos.db'))
+    DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '4'))
+    DATABASE_TIMEOUT = float(os.getenv('DATABASE_TIMEOUT', '5'))
+    DATABASE_CACHE_SIZE_KB = int(os.getenv('DATABASE_CACHE_SIZE_KB', '16384'))
+    DATABASE_MMAP_SIZE = int(os.getenv('DATABASE_MMAP_SIZE', str(64 * 1024 * 1024)))
+    DATABASE_WORKERS = int(os.getenv('DATABASE_WORKERS', '2'))
+
+    # Seconds between background checks for changes to the in-memory
+    # service/staff catalog; a check is one single-row query
+    CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '30'))
+
+    # Photo thumbnails kept decoded in memory by the photo viewers
+    PHOTO_CACHE_SIZE = int(os.getenv('PHOTO_CACHE_SIZE', '64'))
+    # Worker processes for importing photos (0 = one per CPU)
+    PHOTO_INGEST_WORKERS = int(os.getenv('PHOTO_INGEST_WORKERS', '0'))
     DB_HOST = os.getenv('DB_HOST', 'localhost')
     DB_PORT = os.getenv('DB_PORT', '5432')
     DB_NAME = os.getenv('DB_NAME', 'beauty_clinic')
@@ -44,6 +71,9 @@ class Config:
     COMPANY_PHONE = os.getenv('COMPANY_PHONE', 'Your Phone')
     COMPANY_EMAIL = os.getenv('COMPANY_EMAIL', 'your@email.com')
 
+    # Default region for phone numbers typed without a country code
+    PHONE_REGION = os.getenv('PHONE_REGION', 'TH')
+
     @staticmethod
     def ensure_directories():
         """Ensure all required directories exist"""
@@ -52,6 +82,8 @@ class Config:
             Config.BACKUP_DIR,
             Config.LOG_DIR,
             Config.RECEIPT_DIR,
+            Config.INVOICE_DIR,
+            Config.THUMBNAIL_DIR,
             Config.STATIC_DIR,
             Config.STATIC_ASSETS,
             Config.TEMPLATES_DIR
@@ -2,9 +2,10 @@ from pathlib import Path
 import sys
 import logging
 from config import Config
+from app.utils.logging import configure_logging
 
 # Setup logging
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -18,7 +19,7 @@ def setup_environment():
         # Add project root to Python path
         project_root = Path(__file__).resolve().parent
         sys.path.append(str(project_root))
-        logger.debug(f"Added {project_root} to Python path")
+        logger.debug("Added %s to Python path", project_root)
 
     except Exception as e:
         logger.error(f"Error in setup_environment: {e}")
@@ -1,6 +1,6 @@
 import logging
 from app.database.db_manager import DatabaseManager
-from app.database.model import Patient
+import uuid
 from datetime import datetime
 
 logging.basicConfig(level=logging.DEBUG)
@@ -13,14 +13,16 @@ def test_database():
         db = DatabaseManager()
 
         # Test creating a patient
-        test_patient = Patient(
-            id="",
-            name="Test Patient",
-            phone="1234567890",
-            email="test@example.com",
-            address="Test Address",
-            created_at=datetime.now()
-        )
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        test_patient = {
+            'id': str(uuid.uuid4()),
+            'name': "Test Patient",
+            'phone': "1234567890",
+            'email': "test@example.com",
+            'address': "Test Address",
+            'created_at': now,
+            'updated_at': now
+        }
 
         logger.debug("Adding test patient...")
         patient_id = db.add_patient(test_patient)
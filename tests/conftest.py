@@ -0,0 +1,67 @@
+import sys
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+# Make the project root importable however pytest is started
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import Config  # noqa: E402
+from app.database.db_manager import DatabaseManager  # noqa: E402
+from app.database.model import Service, Staff  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Path of a fresh database file, set as Config.DATABASE_PATH"""
+    path = tmp_path / 'clinic.db'
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(path))
+    monkeypatch.setattr(Config, 'SEED_TEST_DATA', False)
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    """A DatabaseManager on a fresh, fully migrated database"""
+    manager = DatabaseManager()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def add_patient(db):
+    """Factory adding a patient; returns its ID"""
+    def add(name='Test Patient', phone='0812345678', email=''):
+        patient_id = str(uuid.uuid4())
+        now = '2026-01-01 09:00:00'
+        db.add_patient({
+            'id': patient_id,
+            'name': name,
+            'phone': phone,
+            'email': email,
+            'created_at': now,
+            'updated_at': now,
+        })
+        return patient_id
+    return add
+
+
+@pytest.fixture
+def add_service(db):
+    """Factory adding a service; returns its ID"""
+    def add(name='Facial', price='1000', category='Skin', duration=30):
+        return db.add_service(Service(
+            id='', name=name, price=Decimal(price), description='',
+            category=category, duration=duration
+        ))
+    return add
+
+
+@pytest.fixture
+def add_doctor(db):
+    """Factory adding a doctor; returns their staff ID"""
+    def add(name='Dr. Test'):
+        return db.add_staff(Staff(id='', name=name, email='', phone='', role='doctor'))
+    return add
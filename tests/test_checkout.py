@@ -0,0 +1,62 @@
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from app.database.model import TransactionItem
+from app.services.checkout import CheckoutService
+
+
+def _item(service_id, price, quantity=1, discount='0', doctor_id=None):
+    return TransactionItem(
+        id='', transaction_id='', service_id=service_id, quantity=quantity,
+        price=Decimal(price), discount=Decimal(discount), doctor_id=doctor_id
+    )
+
+
+def _count(db, table):
+    with db.read_connection() as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def test_checkout_records_the_sale(db, add_patient, add_service, add_doctor):
+    patient_id = add_patient()
+    facial, peel = add_service('Facial', '1000', duration=45), add_service('Peel', '500')
+    doctor_id = add_doctor()
+
+    transaction_id = CheckoutService(db).checkout(patient_id, [
+        _item(facial, '1000', discount='100', doctor_id=doctor_id),
+        _item(peel, '500', quantity=2, discount='50'),
+    ], 'cash')
+
+    with db.read_connection() as conn:
+        transaction = conn.execute(
+            'SELECT total_amount, discount_amount, status FROM transactions WHERE id = ?',
+            (transaction_id,)
+        ).fetchone()
+        assert tuple(transaction) == (1850.0, 150.0, 'completed')
+        doctors = conn.execute(
+            'SELECT service_id, doctor_id FROM appointments WHERE patient_id = ? ORDER BY service_id',
+            (patient_id,)
+        ).fetchall()
+        assert sorted(tuple(row) for row in doctors) == sorted([(facial, doctor_id), (peel, None)])
+    assert _count(db, 'transaction_items') == 2
+
+
+def test_checkout_rolls_back_on_a_bad_service(db, add_patient, add_service):
+    patient_id = add_patient()
+    facial = add_service('Facial', '1000')
+
+    with pytest.raises(sqlite3.IntegrityError):
+        CheckoutService(db).checkout(patient_id, [
+            _item(facial, '1000'),
+            _item('missing', '10'),
+        ], 'cash')
+
+    for table in ('transactions', 'transaction_items', 'appointments', 'daily_sales_totals'):
+        assert _count(db, table) == 0
+
+
+def test_checkout_rejects_an_empty_cart(db, add_patient):
+    with pytest.raises(ValueError):
+        CheckoutService(db).checkout(add_patient(), [], 'cash')
@@ -0,0 +1,102 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.database import migrations
+from app.database.connection import open_connection
+from app.database.migrations import LATEST_VERSION, MIGRATIONS, get_schema_version, migrate
+
+BASELINE_DB = Path(__file__).resolve().parents[1] / 'data' / 'clinic_pos.db'
+
+
+def _triggers(conn, pattern):
+    return dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?", (pattern,)
+    ).fetchall())
+
+
+def test_fresh_database_reaches_latest_version(tmp_path):
+    conn = open_connection(str(tmp_path / 'fresh.db'))
+    try:
+        assert migrate(conn) == len(MIGRATIONS)
+        assert get_schema_version(conn) == LATEST_VERSION
+        # Up to date: nothing left to apply
+        assert migrate(conn) == 0
+    finally:
+        conn.close()
+
+
+@pytest.mark.skipif(not BASELINE_DB.exists(), reason="baseline database not present")
+def test_baseline_database_keeps_its_rows(tmp_path):
+    path = tmp_path / 'baseline.db'
+    shutil.copy(BASELINE_DB, path)
+    with sqlite3.connect(path) as conn:
+        patients = conn.execute('SELECT id, name, phone FROM patients ORDER BY id').fetchall()
+
+    conn = open_connection(str(path))
+    try:
+        migrate(conn)
+        assert get_schema_version(conn) == LATEST_VERSION
+        assert [tuple(row) for row in conn.execute(
+            'SELECT id, name, phone FROM patients ORDER BY id'
+        )] == patients
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(patients)')}
+        assert {'updated_at', 'last_visit_at', 'phone_normalized'} <= columns
+    finally:
+        conn.close()
+
+
+def test_incompatible_table_is_kept_as_legacy(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    with sqlite3.connect(path) as conn:
+        # An older layout without the NOT NULL end_time column
+        conn.execute('CREATE TABLE appointments (id TEXT PRIMARY KEY, patient_id TEXT, start_time TEXT)')
+        conn.execute("INSERT INTO appointments VALUES ('a1', 'p1', '2025-01-01 10:00:00')")
+
+    conn = open_connection(path)
+    try:
+        migrate(conn)
+        assert [row[0] for row in conn.execute('SELECT id FROM appointments_legacy')] == ['a1']
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(appointments)')}
+        assert 'end_time' in columns
+    finally:
+        conn.close()
+
+
+def test_failed_step_leaves_no_partial_changes(tmp_path, monkeypatch):
+    conn = open_connection(str(tmp_path / 'failing.db'))
+    try:
+        migrate(conn, target=LATEST_VERSION - 1)
+
+        def failing_step(conn):
+            conn.execute('CREATE TABLE half_done (x)')
+            raise RuntimeError("step failed")
+
+        monkeypatch.setattr(migrations, 'MIGRATIONS', [
+            *MIGRATIONS[:-1], (LATEST_VERSION, "Failing step", failing_step)
+        ])
+        with pytest.raises(RuntimeError):
+            migrate(conn)
+
+        assert get_schema_version(conn) == LATEST_VERSION - 1
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'half_done'"
+        ).fetchone() is None
+    finally:
+        conn.close()
+
+
+def test_upgraded_rollup_triggers_match_fresh_ones(tmp_path):
+    upgraded = open_connection(str(tmp_path / 'v9.db'))
+    fresh = open_connection(str(tmp_path / 'fresh.db'))
+    try:
+        migrate(upgraded, target=9)
+        migrate(upgraded)
+        migrate(fresh)
+        assert _triggers(upgraded, '%rollup%') == _triggers(fresh, '%rollup%')
+        assert 'trg_transactions_rollup_status' not in _triggers(upgraded, '%rollup%')
+    finally:
+        upgraded.close()
+        fresh.close()
@@ -0,0 +1,62 @@
+import pytest
+
+
+
+def _walk_forward(iter_page, limit, **kwargs):
+    rows, pages, after = [], 0, None
+    while True:
+        page = iter_page(after=after, limit=limit, **kwargs)
+        rows.extend(page.rows)
+        pages += 1
+        if page.next_cursor is None:
+            return rows, pages
+        after = page.next_cursor
+
+
+def _walk_backward(iter_page, before, limit, **kwargs):
+    rows = []
+    while before is not None:
+        page = iter_page(before=before, limit=limit, **kwargs)
+        rows[:0] = page.rows
+        before = page.prev_cursor
+    return rows
+
+
+@pytest.fixture
+def patient_ids(add_patient):
+    # Many equal names, so pages break inside a run of ties
+    return [add_patient(name) for name in ['Ann'] * 23 + ['Bob'] * 7 + ['Cat'] * 11]
+
+
+def test_patients_forward_and_backward(db, patient_ids):
+    expected = sorted(db.stream(db.iter_patients), key=lambda p: (p.name, p.id))
+    assert len(expected) == len(patient_ids)
+
+    rows, pages = _walk_forward(db.iter_patients, limit=5)
+    assert [p.id for p in rows] == [p.id for p in expected]
+    assert pages == 9
+
+    # From the last row back to the start
+    last = expected[-1]
+    rows = _walk_backward(db.iter_patients, db.patient_cursor(last), limit=5)
+    assert [p.id for p in rows] == [p.id for p in expected[:-1]]
+
+
+def test_patient_pages_meet_in_the_middle(db, patient_ids):
+    first = db.iter_patients(limit=10)
+    second = db.iter_patients(after=first.next_cursor, limit=10)
+    back = db.iter_patients(before=second.prev_cursor, limit=10)
+    assert [p.id for p in back.rows] == [p.id for p in first.rows]
+    assert back.prev_cursor is None
+
+
+def test_services_forward_and_backward(db, add_service):
+    for index in range(17):
+        add_service('Facial', category='Skin' if index % 2 else 'Laser')
+    expected = sorted(db.stream(db.iter_services), key=lambda s: (s.name, s.id))
+
+    rows, _ = _walk_forward(db.iter_services, limit=4)
+    assert [s.id for s in rows] == [s.id for s in expected]
+
+    rows = _walk_backward(db.iter_services, db.service_cursor(expected[-1]), limit=4)
+    assert [s.id for s in rows] == [s.id for s in expected[:-1]]
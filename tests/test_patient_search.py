@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture
+def patients(add_patient):
+    add_patient('Somchai Jaidee', '081-234-5678', 'somchai@example.com')
+    add_patient('Suda Rakdee', '089-999-0000', 'suda@example.com')
+    add_patient('Anong Sukjai', '02-555-1234')
+
+
+def _search(db, term):
+    """Run search_patients, returning the matched names and the SQL it ran"""
+    seen = []
+    # The pool hands the same idle connection back to search_patients
+    with db.read_connection() as conn:
+        conn.set_trace_callback(seen.append)
+    try:
+        names = [patient.name for patient in db.search_patients(term)]
+    finally:
+        with db.read_connection() as conn:
+            conn.set_trace_callback(None)
+    return names, ' '.join(seen)
+
+
+def test_phone_digits_use_the_phone_index(db, patients):
+    names, sql = _search(db, '0812')
+    assert names == ['Somchai Jaidee']
+    assert 'phone_normalized GLOB' in sql
+
+    # Trailing digits match through the reversed number
+    names, sql = _search(db, '5678')
+    assert names == ['Somchai Jaidee']
+    assert 'phone_reversed GLOB' in sql
+
+
+def test_longer_terms_use_full_text_search(db, patients):
+    if not db.patient_search_enabled:
+        pytest.skip("SQLite built without the FTS5 trigram tokenizer")
+    names, sql = _search(db, 'jaidee')
+    assert names == ['Somchai Jaidee']
+    assert 'patients_fts MATCH' in sql
+
+    names, _ = _search(db, 'example.com')
+    assert sorted(names) == ['Somchai Jaidee', 'Suda Rakdee']
+
+
+def test_short_terms_fall_back_to_like(db, patients):
+    names, sql = _search(db, 'su')
+    assert sorted(names) == ['Anong Sukjai', 'Suda Rakdee']
+    assert 'LIKE' in sql and 'MATCH' not in sql
@@ -0,0 +1,127 @@
+import random
+from datetime import date, datetime
+
+import pytest
+
+from app.database.maintenance import rebuild_sales_rollup
+from app.services.reports import ReportService
+
+DAYS = ['2025-01-01', '2025-01-02', '2025-01-03']
+
+
+def _rollup(conn):
+    """Rollup rows that count for something, rounded against float drift"""
+    totals = conn.execute('''
+        SELECT sale_date, payment_method, transactions,
+               ROUND(revenue, 6), ROUND(discounts, 6), ROUND(tax, 6)
+        FROM daily_sales_totals
+        WHERE transactions != 0 OR ABS(revenue) > 1e-9 OR ABS(discounts) > 1e-9 OR ABS(tax) > 1e-9
+        ORDER BY 1, 2
+    ''').fetchall()
+    items = conn.execute('''
+        SELECT sale_date, service_id, staff_id, payment_method, quantity, ROUND(revenue, 6)
+        FROM daily_sales_rollup
+        WHERE quantity != 0 OR ABS(revenue) > 1e-9
+        ORDER BY 1, 2, 3, 4
+    ''').fetchall()
+    return [tuple(row) for row in totals], [tuple(row) for row in items]
+
+
+@pytest.fixture
+def catalog(add_patient, add_service, add_doctor):
+    return (
+        add_patient(),
+        [add_service(name) for name in ('Facial', 'Peel', 'Laser')],
+        [add_doctor(name) for name in ('Dr. A', 'Dr. B')],
+    )
+
+
+@pytest.fixture
+def sales(db, catalog):
+    """A random mix of inserts, updates and deletes of sales"""
+    patient_id, service_ids, doctor_ids = catalog
+    rng = random.Random(3)
+    transaction_ids, item_ids = [], []
+
+    with db.get_connection() as conn:
+        for step in range(1500):
+            op = rng.random()
+            if op < 0.35 or not transaction_ids:
+                transaction_ids.append(f't{step}')
+                conn.execute('''
+                    INSERT INTO transactions (id, patient_id, total_amount, payment_method,
+                        transaction_date, status, discount_amount, tax_amount)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    transaction_ids[-1], patient_id, rng.randint(1, 500), rng.choice(['cash', 'card']),
+                    f'{rng.choice(DAYS)} 10:00:00', rng.choice(['completed', 'completed', 'cancelled']),
+                    rng.randint(0, 5), rng.randint(0, 5)
+                ))
+            elif op < 0.6:
+                item_ids.append(f'i{step}')
+                conn.execute('''
+                    INSERT INTO transaction_items (id, transaction_id, service_id, doctor_id,
+                        quantity, price, discount)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    item_ids[-1], rng.choice(transaction_ids), rng.choice(service_ids),
+                    rng.choice([None, *doctor_ids]), rng.randint(1, 3), rng.randint(1, 99), rng.randint(0, 3)
+                ))
+            elif op < 0.75:
+                column, value = rng.choice([
+                    ('status', rng.choice(['completed', 'cancelled'])),
+                    ('payment_method', rng.choice(['cash', 'card'])),
+                    ('transaction_date', f'{rng.choice(DAYS)} 11:00:00'),
+                    ('total_amount', rng.randint(1, 500)),
+                    ('discount_amount', 3),
+                    ('tax_amount', 2),
+                ])
+                conn.execute(f'UPDATE transactions SET {column} = ? WHERE id = ?',
+                             (value, rng.choice(transaction_ids)))
+            elif op < 0.85 and item_ids:
+                column, value = rng.choice([
+                    ('quantity', rng.randint(1, 4)),
+                    ('price', 7),
+                    ('discount', 1),
+                    ('service_id', rng.choice(service_ids)),
+                    ('doctor_id', rng.choice(doctor_ids)),
+                    ('transaction_id', rng.choice(transaction_ids)),
+                ])
+                conn.execute(f'UPDATE transaction_items SET {column} = ? WHERE id = ?',
+                             (value, rng.choice(item_ids)))
+            elif op < 0.93 and item_ids:
+                conn.execute('DELETE FROM transaction_items WHERE id = ?', (item_ids.pop(rng.randrange(len(item_ids))),))
+            else:
+                transaction_id = transaction_ids.pop(rng.randrange(len(transaction_ids)))
+                removed = {row[0] for row in conn.execute(
+                    'SELECT id FROM transaction_items WHERE transaction_id = ?', (transaction_id,)
+                )}
+                item_ids[:] = [item_id for item_id in item_ids if item_id not in removed]
+                conn.execute('DELETE FROM transaction_items WHERE transaction_id = ?', (transaction_id,))
+                conn.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+
+
+def test_triggers_match_a_rebuild(db, sales):
+    with db.get_connection() as conn:
+        maintained = _rollup(conn)
+        assert maintained[0] and maintained[1]
+        rebuild_sales_rollup(conn)
+        assert _rollup(conn) == maintained
+
+
+def test_whole_days_match_the_transactions(db, sales):
+    reports = ReportService(db)
+    start, end = date(2025, 1, 1), date(2025, 1, 3)
+    assert reports.sales_report(start, end) == reports.transactions_report(start, end)
+    assert reports.sales_report(start, end, 'month') == reports.transactions_report(start, end, 'month')
+
+
+def test_time_bounds_read_the_transactions(db, sales):
+    reports = ReportService(db)
+    morning = reports.sales_report(datetime(2025, 1, 2), datetime(2025, 1, 2, 10, 30))
+    with db.read_connection() as conn:
+        count = conn.execute('''
+            SELECT COUNT(*) FROM transactions
+            WHERE transaction_date = '2025-01-02 10:00:00' AND status = 'completed'
+        ''').fetchone()[0]
+    assert count and morning.summary.transactions == count